@@ -11,7 +11,88 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 CURRENCY_API_URL = "https://open.er-api.com/v6/latest/USD"
 
+# Local state (FX table, caches); kept out of git
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data"))
+
+# Exchange rates are refreshed in the background and persisted for cold starts
+FX_REFRESH_INTERVAL = float(os.getenv("FX_REFRESH_INTERVAL", "3600"))
+FX_CACHE_PATH = os.getenv("FX_CACHE_PATH", os.path.join(DATA_DIR, "fx_rates.json"))
+# Used only if neither the API nor the saved table is available
+FX_FALLBACK_RATES = {"USD": 1.0, "KES": 130.0}
+
 RATE_LIMIT = os.getenv("RATE_LIMIT", "5/minute")
 
-CACHE_RESULTS = True
-CACHE_TTL = 3600
\ No newline at end of file
+CACHE_RESULTS = os.getenv("CACHE_RESULTS", "True").lower() in ("true", "1", "t")
+# Cached results are fresh for CACHE_TTL seconds; after that, until
+# CACHE_HARD_TTL, they are still served while a background scrape refreshes them
+CACHE_TTL = float(os.getenv("CACHE_TTL", "3600"))
+CACHE_HARD_TTL = float(os.getenv("CACHE_HARD_TTL", "86400"))
+# In-process LRU tier, bounded by entry count and encoded size
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# SQLite tier that survives restarts; empty path disables it
+CACHE_DISK_PATH = os.getenv("CACHE_DISK_PATH", os.path.join(DATA_DIR, "search_cache.sqlite3"))
+CACHE_DISK_MAX_BYTES = int(os.getenv("CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+# Memory tier and FX table written here on shutdown and restored on startup;
+# empty disables it
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", os.path.join(DATA_DIR, "warm_snapshot.bin"))
+
+# Queries that came back empty from every retailer are not re-scraped for
+# NEGATIVE_CACHE_TTL seconds; kept in rotating Bloom filters of fixed size
+NEGATIVE_CACHE_ENABLED = os.getenv("NEGATIVE_CACHE_ENABLED", "True").lower() in ("true", "1", "t")
+NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "900"))
+NEGATIVE_CACHE_CAPACITY = int(os.getenv("NEGATIVE_CACHE_CAPACITY", "250000"))
+NEGATIVE_CACHE_ERROR_RATE = float(os.getenv("NEGATIVE_CACHE_ERROR_RATE", "0.001"))
+NEGATIVE_CACHE_GENERATIONS = int(os.getenv("NEGATIVE_CACHE_GENERATIONS", "4"))
+# A retailer whose scrape failed for a query is not retried for that query
+# for RETAILER_FAILURE_TTL seconds (same Bloom filters, shorter window)
+RETAILER_FAILURE_TTL = float(os.getenv("RETAILER_FAILURE_TTL", "120"))
+
+# Shared HTTP client settings
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "True").lower() in ("true", "1", "t")
+
+# Token bucket for hosts without a rate_limit in retailers.yaml:
+# (requests per second, burst)
+DEFAULT_RATE_LIMIT = (1.0, 2)
+
+# Thread pool for blocking calls (database client, file IO)
+IO_WORKERS = int(os.getenv("IO_WORKERS", "8"))
+# Database calls in flight at once (each holds an IO_WORKERS thread)
+DB_MAX_CONCURRENCY = int(os.getenv("DB_MAX_CONCURRENCY", "4"))
+# Storage for searches and products: "supabase", or "sqlite" for a local
+# database file that needs no network or credentials
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase").lower()
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(DATA_DIR, "cartana.sqlite3"))
+# Search results are saved after the response, in bulk: a flush starts once
+# WRITE_BEHIND_BATCH_SIZE product rows are queued or every
+# WRITE_BEHIND_FLUSH_INTERVAL seconds, and is retried with backoff
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "1000"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "50000"))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "5"))
+WRITE_BEHIND_RETRY_BACKOFF = float(os.getenv("WRITE_BEHIND_RETRY_BACKOFF", "0.5"))
+
+# Price observations from every saved scrape, in append-only memory-mapped
+# segments under PRICE_HISTORY_DIR (empty disables). Buffered observations
+# become a segment every PRICE_HISTORY_FLUSH_INTERVAL seconds or at
+# PRICE_HISTORY_FLUSH_ROWS; once more than PRICE_HISTORY_MAX_SEGMENTS
+# segments of a similar size (below PRICE_HISTORY_SEGMENT_ROWS rows) exist,
+# they are merged
+PRICE_HISTORY_DIR = os.getenv("PRICE_HISTORY_DIR", os.path.join(DATA_DIR, "price_history"))
+PRICE_HISTORY_FLUSH_INTERVAL = float(os.getenv("PRICE_HISTORY_FLUSH_INTERVAL", "60"))
+PRICE_HISTORY_FLUSH_ROWS = int(os.getenv("PRICE_HISTORY_FLUSH_ROWS", "50000"))
+PRICE_HISTORY_MAX_SEGMENTS = int(os.getenv("PRICE_HISTORY_MAX_SEGMENTS", "8"))
+PRICE_HISTORY_SEGMENT_ROWS = int(os.getenv("PRICE_HISTORY_SEGMENT_ROWS", "1000000"))
+
+# HTML parsing runs in a pool of worker processes; 0 parses inline
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", str(os.cpu_count() or 1)))
+
+# Declarative retailer adapters (selectors, URLs, rate limits), hot-reloaded
+RETAILERS_CONFIG = os.getenv(
+    "RETAILERS_CONFIG", os.path.join(os.path.dirname(__file__), "retailers.yaml")
+)
+RETAILERS_RELOAD_INTERVAL = float(os.getenv("RETAILERS_RELOAD_INTERVAL", "2"))
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Request
+
+from . import database
+from .config import CACHE_SNAPSHOT_PATH, IO_WORKERS, RETAILER_FAILURE_TTL
+from .models.product_record import ProductRecord
+from .repositories.base import SearchRepository
+from .services.cache import close_search_cache, get_search_cache
+from .services.fx_service import get_fx_service
+from .services.http_client import close_http_client, get_http_client
+from .services.negative_cache import NegativeCache, get_negative_cache
+from .services.parser_pool import get_parser_pool, shutdown_parser_pool
+from .services.price_history import close_price_history, get_price_history
+from .services.product_services import ProductService, search_flight
+from .services.rate_limiter import get_rate_limiter
+from .services.retailer_registry import get_registry
+from .services.scraper_service import ScraperService
+from .services.warm_restart import load_warm_snapshot, save_warm_snapshot
+from .services.write_behind import WriteBehindQueue
+from .utils.query_canonicalizer import get_query_canonicalizer
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """Long-lived services shared by every request.
+
+    Built once in the app's lifespan: the scraper engine, the HTTP client
+    pools, the parser pool, the FX table, the result cache, the database
+    client, the price history and a sized thread pool for blocking calls.
+    Request dependencies only hand out references to these.
+    """
+
+    def __init__(
+        self,
+        scraper: Optional[ScraperService] = None,
+        repository: Optional[SearchRepository] = None,
+    ):
+        self.rate_limiter = get_rate_limiter()
+        self.http = get_http_client()
+        self.registry = get_registry()
+        self.parser_pool = get_parser_pool()
+        self.fx = get_fx_service()
+        self.repository = repository or database.get_search_repository()
+        self.price_history = get_price_history()
+        # Scrape results are saved off the response path; weighted by rows
+        # (the search row plus its products)
+        self.writer = WriteBehindQueue(
+            self._save_results, "search_results", weight=lambda item: 1 + len(item[1])
+        )
+        self.cache = get_search_cache()
+        self.queries = get_query_canonicalizer()
+        self.negative_cache = get_negative_cache()
+        # Enabled along with the negative cache
+        self.retailer_failures = (
+            NegativeCache(ttl=RETAILER_FAILURE_TTL) if self.negative_cache is not None else None
+        )
+        self.executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+        self.scraper = scraper or ScraperService(
+            http_client=self.http,
+            parser_pool=self.parser_pool,
+            registry=self.registry,
+            fx=self.fx,
+        )
+        self.product_service = ProductService(
+            scraper=self.scraper,
+            cache=self.cache,
+            queries=self.queries,
+            negative=self.negative_cache,
+            writer=self.writer,
+            failures=self.retailer_failures,
+        )
+        self._registry_watcher: Optional[asyncio.Task] = None
+        self.warm_restart: Dict = {}
+
+    async def _save_results(self, searches: Sequence[Tuple[str, List[ProductRecord]]]) -> List[Dict]:
+        rows = await self.repository.save_many(searches)
+        # Saved rows carry their catalog ids, which key the price history
+        if self.price_history is not None:
+            self.price_history.record(rows)
+        return rows
+
+    async def start(self):
+        # Blocking calls made with run_in_executor(None, ...) share this pool
+        asyncio.get_running_loop().set_default_executor(self.executor)
+        # Start parser workers before the first search arrives
+        await self.parser_pool.warm_up()
+        # Pick up retailers.yaml edits without a restart
+        self._registry_watcher = asyncio.create_task(self.registry.watch())
+        # Hot cache entries and the FX table from the last graceful shutdown
+        if CACHE_SNAPSHOT_PATH:
+            memory = self.cache.memory if self.cache is not None else None
+            self.warm_restart = load_warm_snapshot(CACHE_SNAPSHOT_PATH, memory, self.fx)
+        # Exchange rates load once here and refresh in the background
+        await self.fx.start()
+        if self.price_history is not None:
+            await self.price_history.start()
+        await self.writer.start()
+        logger.info("Services started")
+
+    async def stop(self):
+        if self._registry_watcher is not None:
+            self._registry_watcher.cancel()
+        # Background cache refreshes use the HTTP client and parser pool
+        await self.product_service.stop()
+        await self.fx.stop()
+        if CACHE_SNAPSHOT_PATH:
+            memory = self.cache.memory if self.cache is not None else None
+            try:
+                self.warm_restart.update(save_warm_snapshot(CACHE_SNAPSHOT_PATH, memory, self.fx))
+            except OSError as e:
+                logger.error(f"Could not save warm restart snapshot: {e}")
+        # Queued results go out before the database client closes
+        await self.writer.stop()
+        # Observations recorded by the last flushes are written as a segment
+        await close_price_history()
+        # Release pooled retailer connections, parser workers and IO threads
+        await self.repository.close()
+        await close_http_client()
+        shutdown_parser_pool()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        # After the executor, so no cache write is still running
+        close_search_cache()
+        logger.info("Services stopped")
+
+    def metrics(self) -> Dict:
+        return {
+            "rate_limits": self.rate_limiter.snapshot(),
+            "search_single_flight": search_flight.snapshot(),
+            "retailer_config_version": self.registry.version,
+            "fx": self.fx.snapshot(),
+            "result_cache": self.cache.snapshot() if self.cache is not None else None,
+            "cache_revalidation": self.product_service.revalidation_snapshot(),
+            "query_canonicalization": self.queries.snapshot(),
+            "negative_cache": self.negative_cache.snapshot() if self.negative_cache is not None else None,
+            "retailer_failures": self.retailer_failures.snapshot() if self.retailer_failures is not None else None,
+            "warm_restart": self.warm_restart,
+            "database": self.repository.snapshot(),
+            "write_behind": self.writer.snapshot(),
+            "price_history": self.price_history.snapshot() if self.price_history is not None else None,
+        }
+
+
+def get_services(request: Request) -> ServiceContainer:
+    return request.app.state.services
+
+
+def get_product_service(request: Request) -> ProductService:
+    return request.app.state.services.product_service
@@ -1,45 +1,48 @@
 from supabase import create_client, Client
-from .config import SUPABASE_URL, SUPABASE_KEY
+from typing import List, Optional
+from .config import DB_BACKEND, SUPABASE_URL, SUPABASE_KEY
+from .models.product_record import ProductRecord
+from .repositories.base import SearchRepository
+from .repositories.sqlite_repository import SqliteSearchRepository
+from .repositories.supabase_repository import SupabaseSearchRepository
 
-#set up supabase interface
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+#every call goes through the repository, which runs the blocking client
+#off the event loop; DB_BACKEND picks supabase or a local sqlite file
+_repository: Optional[SearchRepository] = None
 
-#async function to get recent searches
-
-async def get_recent_searches(limit: int = 10):
-    response = supabase.table("searches").select("*").order("created_at", desc=True).limit(limit).execute()
-    return response.data
 
+#set up supabase interface, only when that backend is selected, so the app
+#starts without credentials on sqlite
 
-#save product results to database
+def create_supabase_client() -> Client:
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
 
-async def save_product_results(query: str, products: list):
-    #we save the search query first
-    search_data = {"query": query, "results_count": len(products)}
-    search_response = supabase.table("searches").insert(search_data).execute()
-    search_id = search_response.data[0]["id"] if search_response.data else None
 
-    if search_id and products:
+def get_search_repository() -> SearchRepository:
+    """Return the process-wide search repository, creating it on first use."""
+    global _repository
+    if _repository is None:
+        if DB_BACKEND == "sqlite":
+            _repository = SqliteSearchRepository()
+        elif DB_BACKEND == "supabase":
+            _repository = SupabaseSearchRepository(create_supabase_client())
+        else:
+            raise ValueError(f"Unknown DB_BACKEND {DB_BACKEND!r} (expected 'supabase' or 'sqlite')")
+    return _repository
 
-        for product in products:
-            product["search_id"] = search_id
 
-        product_response = supabase.table("products").insert(products).execute()
-        return product_response.data
-    
-    return []
+#async function to get recent searches
 
+async def get_recent_searches(limit: int = 10):
+    return await get_search_repository().recent_searches(limit)
 
-async def get_products_by_query(query: str):
 
-    search_response = supabase.table("searches").select("id").eq("query", query).order("created_at", desc=True).limit(1).execute()
+#save product results to database; query is the canonical key from
+#QueryCanonicalizer so equivalent searches find the same rows
 
-    if search_response.data:
-        search_id = search_response.data[0]["id"]
+async def save_product_results(query: str, products: List[ProductRecord]):
+    return await get_search_repository().save_results(query, products)
 
-        products_response = supabase.table("product").select("*").eq("search_id", search_id).execute()
-        return products_response.data
-    
-    return []
-    
 
+async def get_products_by_query(query: str):
+    return await get_search_repository().products_for_query(query)
@@ -2,23 +2,56 @@ from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-import asyncio
-import math
-import time
+from contextlib import asynccontextmanager
+import logging
 import os
 from dotenv import load_dotenv
 import supabase
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 # Import your scraper
 from .productscraper import ProductScraper
+from .container import ServiceContainer
+from .repositories.supabase_repository import SupabaseSearchRepository
+from .services.single_flight import SingleFlight
+from .utils.query_canonicalizer import get_query_canonicalizer
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Parser workers, retailer config watcher, FX table and client pools,
+    # shared by every request and released on shutdown; database calls go
+    # through this app's Supabase repository
+    services = ServiceContainer(scraper=scraper, repository=db)
+    await services.start()
+    app.state.services = services
+
+    # Create tables if they don't exist
+    # In practice, you would use database migrations for this
+    # This is just a simple example
+    try:
+        # Check if tables exist (on the services' IO pool)
+        await db.run(supabase_client.table("searches").select("id").limit(1), "check_searches")
+        await db.run(supabase_client.table("catalog_products").select("id").limit(1), "check_products")
+    except Exception as e:
+        logger.warning(f"Tables might not exist yet: {e}")
+        # You would implement proper table creation here
+        pass
+
+    try:
+        yield
+    finally:
+        # Also drains the write-behind queue of search results
+        await services.stop()
+
 # Initialize FastAPI app
 app = FastAPI(title="Price Comparison API", 
-              description="API for comparing product prices across Amazon, eBay, Jumia, and Kilimall")
+              description="API for comparing product prices across Amazon, eBay, Jumia, and Kilimall",
+              lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -33,13 +66,18 @@ app.add_middleware(
 supabase_url = os.getenv("SUPABASE_URL")
 supabase_key = os.getenv("SUPABASE_KEY")
 supabase_client = supabase.create_client(supabase_url, supabase_key)
+# Runs the blocking client calls on the IO thread pool, a few at a time
+db = SupabaseSearchRepository(supabase_client)
 
 # Initialize scraper
 scraper = ProductScraper()
 
-# Cache for recent searches (to reduce redundant scraping)
-search_cache = {}
-CACHE_EXPIRY = 3600  # Cache results for 1 hour
+# Identical concurrent searches attach to one in-flight scrape
+search_flight = SingleFlight()
+
+# Equivalent queries ("iPhone 15 case", "case iphone 15") share one key for
+# the cache, the searches table and search_flight
+queries = get_query_canonicalizer()
 
 # Pydantic models
 class ProductBase(BaseModel):
@@ -62,107 +100,37 @@ class SearchRequest(BaseModel):
     query: str
 
 class SearchResponse(BaseModel):
-    search_id: int
+    # None for fresh results, which are saved after the response
+    search_id: Optional[int] = None
     results: List[ProductResponse]
     timestamp: datetime
     query: str
 
-# Function to store search results in Supabase
-async def store_search_results(query: str, results: List[dict]):
-    # Create a search record
-    search_data = {
-        "query": query,
-        "timestamp": datetime.now().isoformat(),
-        "result_count": len(results)
+# Searches are kept for a day before the scraper runs again
+RECENT_SEARCH_MAX_AGE = timedelta(hours=24)
+
+def is_recent(timestamp: str) -> bool:
+    searched_at = datetime.fromisoformat(timestamp)
+    if searched_at.tzinfo is None:
+        # SQLite stores UTC times without an offset
+        searched_at = searched_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - searched_at < RECENT_SEARCH_MAX_AGE
+
+def search_response(rows: List[dict]) -> dict:
+    """Response for stored product rows, from the search columns of the catalog join."""
+    return {
+        "search_id": rows[0]["search_id"],
+        "results": rows,
+        "timestamp": rows[0]["searched_at"],
+        "query": rows[0]["query"],
     }
-    
-    # Insert search data
-    search_response = supabase_client.table("searches").insert(search_data).execute()
-    
-    if len(search_response.data) == 0:
-        print("Failed to insert search data")
-        return
-        
-    search_id = search_response.data[0]["id"]
-    
-    # Prepare product data with search_id reference
-    products_data = []
-    for product in results:
-        product_data = {
-            "search_id": search_id,
-            "title": product["title"],
-            "price": product["price"],
-            "currency": product["currency"],
-            "source": product["source"],
-            "url": product["url"],
-            "description": product.get("description", ""),
-            "price_kes": product.get("price_kes"),
-            "price_usd": product.get("price_usd")
-        }
-        products_data.append(product_data)
-    
-    # Insert products in batches of 100
-    batch_size = 100
-    cleaned_products_data = []
-
-# Clean the data before insertion
-    for product in products_data:
-    # Replace infinity and NaN values
-        for key, value in product.items():
-            if isinstance(value, float):
-                if math.isnan(value) or math.isinf(value):
-                    product[key] = None
-    
-    # Ensure price fields are valid numbers
-    for price_field in ['price', 'price_kes', 'price_usd']:
-        if price_field in product and product[price_field] is not None:
-            # If it's a string with currency code, extract just the number
-            if isinstance(product[price_field], str) and any(currency in product[price_field] for currency in ['KES', 'USD']):
-                try:
-                    product[price_field] = float(product[price_field].split()[0])
-                except ValueError:
-                    product[price_field] = None
-    
-    cleaned_products_data.append(product)
-
-# Insert the cleaned data
-    for i in range(0, len(cleaned_products_data), batch_size):
-        batch = cleaned_products_data[i:i+batch_size]
-        supabase_client.table("products").insert(batch).execute()
-
-    print(f"Stored {len(cleaned_products_data)} products for search query: {query}")
-    return search_id
 
 # Check if search results already exist in database
 async def get_recent_search(query: str):
-    # Check for recent searches (within last 24 hours)
-    time_24h_ago = (datetime.now() - timedelta(hours=24)).isoformat()
-    
-    response = supabase_client.table("searches") \
-        .select("id, query, timestamp") \
-        .eq("query", query) \
-        .gte("timestamp", time_24h_ago) \
-        .order("timestamp", desc=True) \
-        .limit(1) \
-        .execute()
-    
-    if response.data and len(response.data) > 0:
-        search_id = response.data[0]["id"]
-        
-        # Get products for this search
-        products_response = supabase_client.table("products") \
-            .select("*") \
-            .eq("search_id", search_id) \
-            .execute()
-        
-        if products_response.data and len(products_response.data) > 0:
-            return {
-                "search_id": search_id,
-                "results": products_response.data,
-                "timestamp": response.data[0]["timestamp"],
-                "query": query
-            }
-    
+    # The latest search's products, with its id and time, in one lookup
+    rows = await app.state.services.repository.products_for_query(query)
+    if rows and is_recent(rows[0]["searched_at"]):
+        return search_response(rows)
     return None
 
 # API endpoints
@@ -173,102 +141,100 @@ async def search_products(request: SearchRequest, background_tasks: BackgroundTa
     if not query:
         raise HTTPException(status_code=400, detail="Search query cannot be empty")
     
-    # Check cache first
-    cache_key = query.lower()
-    if cache_key in search_cache:
-        cached_data, timestamp = search_cache[cache_key]
-        # Check if cache is still valid
-        if time.time() - timestamp < CACHE_EXPIRY:
-            print(f"Returning cached results for '{query}'")
-            return cached_data
+    # Check the bounded memory/disk result cache first
+    cache_key = queries.key(query)
+    cache = app.state.services.cache
+    if cache is not None:
+        entry = await cache.get(f"response:{cache_key}")
+        if entry is not None:
+            logger.info(f"Returning cached results for '{query}'")
+            if entry.stale:
+                # Answer from the stale copy; re-scrape after the response is sent
+                background_tasks.add_task(refresh_search, query, cache_key)
+            # The entry may have been stored for another spelling of the query
+            return {**entry.value, "query": query}
+    
+    # Recently empty everywhere: answer without another scrape of every retailer
+    negative_cache = app.state.services.negative_cache
+    if negative_cache is not None and negative_cache.contains(cache_key):
+        logger.info(f"Skipping scrape for recently empty query '{query}'")
+        raise HTTPException(status_code=404, detail="No products found")
     
+    response_data = await search_flight.do(cache_key, lambda: run_search(query, cache_key))
+    
+    if response_data is None:
+        raise HTTPException(status_code=404, detail="No products found")
+    
+    return {**response_data, "query": query}
+
+async def run_search(query: str, cache_key: str):
+    """Database lookup, scrape and store for one query; shared by concurrent callers."""
     # Check if we have recent results in the database
-    recent_search = await get_recent_search(query)
+    recent_search = await get_recent_search(cache_key)
     if recent_search:
-        print(f"Returning recent search results from database for '{query}'")
-        # Update cache
-        search_cache[cache_key] = (recent_search, time.time())
+        logger.info(f"Returning recent search results from database for '{query}'")
+        await cache_response(cache_key, recent_search)
         return recent_search
     
+    return await scrape_and_store(query, cache_key)
+
+async def refresh_search(query: str, cache_key: str):
+    """Background re-scrape of a stale cached response; the stale copy stays on failure."""
+    try:
+        # Stale hits arriving together share one refresh
+        await search_flight.do(f"refresh:{cache_key}", lambda: scrape_and_store(query, cache_key))
+    except Exception as e:
+        logger.error(f"Error refreshing results for '{query}': {e}")
+
+async def scrape_and_store(query: str, cache_key: str):
     # Run scraper to get fresh results
-    print(f"Running scraper for '{query}'")
-    df = scraper.search_products(query)
+    logger.info(f"Running scraper for '{query}'")
+    batch, statuses = await scraper.search_batch(query)
     
-    if df.empty:
-        raise HTTPException(status_code=404, detail="No products found")
+    if batch.empty:
+        logger.info(f"No results found with valid prices for '{query}'")
+        negative_cache = app.state.services.negative_cache
+        # A failed retailer might have had results; only remember clean misses
+        if negative_cache is not None and all(status == "ok" for status in statuses.values()):
+            negative_cache.add(cache_key)
+        return None
     
-    # Convert DataFrame to list of dictionaries
-    results = df.to_dict('records')
+    # One pass from columns to response records
+    results = batch.to_records(display=True)
     
-    # Store results in database as a background task
-    search_id = await store_search_results(query, results)
+    # The search and its catalog rows are saved after the response, batched
+    # with other searches by the services' write-behind queue
+    app.state.services.writer.submit((query, batch.to_products()))
     
     # Format the response
     response_data = {
-        "search_id": search_id,
+        "search_id": None,
         "results": results,
         "timestamp": datetime.now().isoformat(),
         "query": query
     }
     
-    # Update cache
-    search_cache[cache_key] = (response_data, time.time())
+    await cache_response(cache_key, response_data)
     
     return response_data
 
+async def cache_response(cache_key: str, response_data: dict):
+    cache = app.state.services.cache
+    if cache is not None:
+        await cache.set(f"response:{cache_key}", response_data)
+
 @app.get("/search/{search_id}", response_model=SearchResponse)
 async def get_search_by_id(search_id: int):
-    # Get search record
-    search_response = supabase_client.table("searches") \
-        .select("*") \
-        .eq("id", search_id) \
-        .limit(1) \
-        .execute()
+    rows = await app.state.services.repository.products_for_search(search_id)
     
-    if not search_response.data or len(search_response.data) == 0:
+    if not rows:
         raise HTTPException(status_code=404, detail="Search not found")
     
-    search_data = search_response.data[0]
-    
-    # Get products for this search
-    products_response = supabase_client.table("products") \
-        .select("*") \
-        .eq("search_id", search_id) \
-        .execute()
-    
-    # Format the response
-    response_data = {
-        "search_id": search_id,
-        "results": products_response.data,
-        "timestamp": search_data["timestamp"],
-        "query": search_data["query"]
-    }
-    
-    return response_data
+    return search_response(rows)
 
 @app.get("/recent-searches", response_model=List[dict])
 async def get_recent_searches(limit: int = Query(10, ge=1, le=50)):
-    response = supabase_client.table("searches") \
-        .select("id, query, timestamp, result_count") \
-        .order("timestamp", desc=True) \
-        .limit(limit) \
-        .execute()
-    
-    return response.data
-
-@app.on_event("startup")
-async def startup_event():
-    # Create tables if they don't exist
-    # In practice, you would use database migrations for this
-    # This is just a simple example
-    try:
-        # Check if tables exist
-        searches_exists = supabase_client.table("searches").select("id").limit(1).execute()
-        products_exists = supabase_client.table("products").select("id").limit(1).execute()
-    except Exception as e:
-        print(f"Tables might not exist yet: {e}")
-        # You would implement proper table creation here
-        pass
+    return await app.state.services.repository.recent_searches(limit)
 
 if __name__ == "__main__":
     import uvicorn
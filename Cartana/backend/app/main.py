@@ -1,10 +1,12 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import logging
 import time
 
 from .config import API_PREFIX, DEBUG
+from .container import ServiceContainer, get_services
 from .routers import products
 
 # Configure logging
@@ -13,8 +15,20 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the shared services once and release them on shutdown."""
+    services = ServiceContainer()
+    await services.start()
+    app.state.services = services
+    try:
+        yield
+    finally:
+        await services.stop()
+
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Price Comparison API",
     description="API for comparing product prices across multiple e-commerce platforms",
     version="1.0.0",
@@ -62,6 +76,11 @@ async def global_exception_handler(request: Request, exc: Exception):
 async def health_check():
     return {"status": "healthy"}
 
+# Runtime metrics
+@app.get(f"{API_PREFIX}/metrics")
+async def metrics(services: ServiceContainer = Depends(get_services)):
+    return services.metrics()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=DEBUG)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class ProductBase(BaseModel):
@@ -31,10 +31,44 @@ class SearchRequest(BaseModel):
     query: str = Field(..., min_length=2, max_length=100)
 
 
+class ProductResult(BaseModel):
+    """A product as returned by the search endpoints."""
+    title: str
+    price: float
+    currency: str
+    display_price: str
+    price_usd: Optional[str] = None
+    price_kes: Optional[str] = None
+    description: Optional[str] = ""
+    source: str
+    url: str
+    logo_url: str
+
+
+class PricePoint(BaseModel):
+    timestamp: datetime
+    price: float
+    currency: str
+
+
+class PriceHistoryResponse(BaseModel):
+    product_id: int
+    since: datetime
+    until: datetime
+    points: List[PricePoint]
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    latest_price: Optional[float] = None
+    # Latest price against the first one in the window, in percent
+    change_pct: Optional[float] = None
+
+
 class SearchResponse(BaseModel):
     query: str
     timestamp: datetime
-    products: List[ProductReponse]
+    products: List[ProductResult]
+    # Per-source status: ok / timed_out / failed / cached
+    sources: Dict[str, str] = {}
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,180 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .product_record import ProductRecord
+
+
+class ProductBatch:
+    """Search results stored column-wise.
+
+    Prices are float64 arrays and source/currency are small integer codes
+    into interned name tables, so currency conversion and sorting run as
+    array operations. Records are built once, when the response is
+    materialized with ``to_records``.
+    """
+
+    def __init__(
+        self,
+        titles: np.ndarray,
+        price: np.ndarray,
+        currency_codes: np.ndarray,
+        currencies: List[str],
+        source_codes: np.ndarray,
+        sources: List[str],
+        urls: np.ndarray,
+        descriptions: np.ndarray,
+        extras: np.ndarray,
+        price_usd: Optional[np.ndarray] = None,
+        price_kes: Optional[np.ndarray] = None,
+    ):
+        self.titles = titles
+        self.price = price
+        self.currency_codes = currency_codes
+        self.currencies = currencies
+        self.source_codes = source_codes
+        self.sources = sources
+        self.urls = urls
+        self.descriptions = descriptions
+        self.extras = extras
+        # NaN until convert() fills them
+        self.price_usd = price_usd if price_usd is not None else np.full(len(price), np.nan)
+        self.price_kes = price_kes if price_kes is not None else np.full(len(price), np.nan)
+
+    @classmethod
+    def from_records(cls, records: Sequence[ProductRecord]) -> 'ProductBatch':
+        """Build a batch from scraped product records."""
+        n = len(records)
+        currencies: Dict[str, int] = {}
+        sources: Dict[str, int] = {}
+        currency_codes = np.fromiter(
+            (currencies.setdefault(r.currency, len(currencies)) for r in records),
+            dtype=np.int16, count=n,
+        )
+        source_codes = np.fromiter(
+            (sources.setdefault(r.source, len(sources)) for r in records),
+            dtype=np.int16, count=n,
+        )
+        return cls(
+            titles=_object_array([r.title for r in records]),
+            price=np.fromiter((r.price for r in records), dtype=np.float64, count=n),
+            currency_codes=currency_codes,
+            currencies=list(currencies),
+            source_codes=source_codes,
+            sources=list(sources),
+            urls=_object_array([r.url for r in records]),
+            descriptions=_object_array([r.description for r in records]),
+            extras=_object_array([r.extra for r in records]),
+            # Converted prices a scraper already supplied (0/None count as missing)
+            price_usd=np.fromiter((r.price_usd or np.nan for r in records), dtype=np.float64, count=n),
+            price_kes=np.fromiter((r.price_kes or np.nan for r in records), dtype=np.float64, count=n),
+        )
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def _is_currency(self, currency: str) -> np.ndarray:
+        if currency not in self.currencies:
+            return np.zeros(len(self), dtype=bool)
+        return self.currency_codes == self.currencies.index(currency)
+
+    def convert(self, rates: Dict[str, float]) -> 'ProductBatch':
+        """Fill price_usd and price_kes for every row, in place.
+
+        ``rates`` is units of each currency per USD (see FxService). USD and
+        KES rows keep a converted price the scraper supplied; currencies
+        missing from the table are treated as USD.
+        """
+        usd_to_kes = rates['KES']
+        is_usd = self._is_currency('USD')
+        is_kes = self._is_currency('KES')
+        # One rate per currency code, then a gather per row
+        code_rates = np.array([rates.get(currency, 1.0) for currency in self.currencies], dtype=np.float64)
+        price_usd = self.price / code_rates[self.currency_codes]
+        price_kes = np.where(is_kes, self.price, price_usd * usd_to_kes)
+        self.price_usd = np.where(is_kes & ~np.isnan(self.price_usd), self.price_usd, price_usd)
+        self.price_kes = np.where(is_usd & ~np.isnan(self.price_kes), self.price_kes, price_kes)
+        return self
+
+    def take(self, indices: np.ndarray) -> 'ProductBatch':
+        """Rows at ``indices``, sharing the name tables."""
+        return ProductBatch(
+            titles=self.titles[indices],
+            price=self.price[indices],
+            currency_codes=self.currency_codes[indices],
+            currencies=self.currencies,
+            source_codes=self.source_codes[indices],
+            sources=self.sources,
+            urls=self.urls[indices],
+            descriptions=self.descriptions[indices],
+            extras=self.extras[indices],
+            price_usd=self.price_usd[indices],
+            price_kes=self.price_kes[indices],
+        )
+
+    def sort_by_usd(self) -> 'ProductBatch':
+        """Rows ordered by USD price; ties keep their scrape order."""
+        return self.take(np.argsort(self.price_usd, kind='stable'))
+
+    def to_products(self) -> List[ProductRecord]:
+        """Materialize the batch as product records."""
+        currency_names = np.array(self.currencies, dtype=object)[self.currency_codes].tolist()
+        source_names = np.array(self.sources, dtype=object)[self.source_codes].tolist()
+        return [
+            ProductRecord(title, price, currency, source, url, description, price_usd, price_kes, extra)
+            for title, price, currency, source, url, description, price_usd, price_kes, extra in zip(
+                self.titles.tolist(), self.price.tolist(), currency_names, source_names,
+                self.urls.tolist(), self.descriptions.tolist(),
+                _nan_to_none(self.price_usd), _nan_to_none(self.price_kes), self.extras.tolist(),
+            )
+        ]
+
+    def to_records(self, display: bool = False) -> List[Dict]:
+        """Materialize the batch as product dicts, for JSON and table views.
+
+        With ``display`` each record also gets display_price and the
+        "1.00 USD" / "130.00 KES" strings used by the table views.
+        """
+        currency_names = np.array(self.currencies, dtype=object)[self.currency_codes].tolist()
+        source_names = np.array(self.sources, dtype=object)[self.source_codes].tolist()
+        price = self.price.tolist()
+        price_usd = _nan_to_none(self.price_usd)
+        price_kes = _nan_to_none(self.price_kes)
+
+        records = []
+        for i, (title, url, description, extra) in enumerate(
+            zip(self.titles.tolist(), self.urls.tolist(), self.descriptions.tolist(), self.extras.tolist())
+        ):
+            record = {
+                'title': title,
+                'price': price[i],
+                'currency': currency_names[i],
+                'description': description,
+                'source': source_names[i],
+                'url': url,
+                'price_usd': price_usd[i],
+                'price_kes': price_kes[i],
+            }
+            if extra:
+                record.update(extra)
+            if display:
+                record['display_price'] = f"{price[i]:.2f} {currency_names[i]}"
+                record['price_usd_display'] = f"{price_usd[i]:.2f} USD" if price_usd[i] is not None else "N/A"
+                record['price_kes_display'] = f"{price_kes[i]:.2f} KES" if price_kes[i] is not None else "N/A"
+            records.append(record)
+        return records
+
+
+def _object_array(values: list) -> np.ndarray:
+    # np.array would try to build nested arrays from dicts/sequences
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _nan_to_none(values: np.ndarray) -> list:
+    return np.where(np.isnan(values), None, values).tolist()
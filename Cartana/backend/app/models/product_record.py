@@ -0,0 +1,70 @@
+import sys
+from typing import Any, Dict, Optional
+
+# Fields every product has; anything else a retailer exposes (sku,
+# review_score, ...) lives in ``extra``
+BASE_FIELDS = ('title', 'price', 'currency', 'price_usd', 'price_kes', 'description', 'source', 'url')
+
+
+class ProductRecord:
+    """One scraped product, shared by the scrapers, services and database layer.
+
+    Uses ``__slots__`` so a record is a fixed-size object rather than a dict,
+    and interns ``source`` and ``currency`` so every record from a retailer
+    points at the same two strings.
+    """
+
+    __slots__ = BASE_FIELDS + ('extra',)
+
+    def __init__(
+        self,
+        title: str,
+        price: float,
+        currency: str,
+        source: str,
+        url: str,
+        description: str = '',
+        price_usd: Optional[float] = None,
+        price_kes: Optional[float] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        self.title = title
+        self.price = price
+        self.currency = sys.intern(currency)
+        self.source = sys.intern(source)
+        self.url = url
+        self.description = description
+        self.price_usd = price_usd
+        self.price_kes = price_kes
+        # None rather than an empty dict for the common case
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ProductRecord':
+        """Build a record from a product dict, e.g. a row loaded from the database."""
+        extra = {key: value for key, value in data.items() if key not in BASE_FIELDS}
+        return cls(
+            title=data['title'],
+            price=data['price'],
+            currency=data['currency'],
+            source=data['source'],
+            url=data['url'],
+            description=data.get('description') or '',
+            price_usd=data.get('price_usd'),
+            price_kes=data.get('price_kes'),
+            extra=extra,
+        )
+
+    def to_dict(self, include_extra: bool = True) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in BASE_FIELDS}
+        if include_extra and self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ProductRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"ProductRecord({self.source}: {self.title[:40]!r} {self.price} {self.currency})"
@@ -0,0 +1,121 @@
+import abc
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..models.product_record import ProductRecord
+from ..utils.metrics import LatencyStats
+from ..utils.query_canonicalizer import get_query_canonicalizer
+from ..utils.url_canonicalizer import canonical_url
+
+logger = logging.getLogger(__name__)
+
+
+def catalog_rows(searches: Sequence[Tuple[str, List[ProductRecord]]]) -> Tuple[List[Dict], List[List[str]]]:
+    """Catalog rows for a batch of searches, one per canonical URL.
+
+    Returns the rows (the latest sighting of a listing wins, so its price is
+    current) and, for each search, the canonical URLs of its products in
+    result order.
+    """
+    catalog: Dict[str, Dict] = {}
+    links = []
+    for _, products in searches:
+        urls = []
+        for product in products:
+            # The catalog only has the common columns
+            row = product.to_dict(include_extra=False)
+            row["url"] = canonical_url(product.url)
+            catalog[row["url"]] = row
+            urls.append(row["url"])
+        links.append(urls)
+    return list(catalog.values()), links
+
+
+class SearchRepository(abc.ABC):
+    """Storage for searches and their products.
+
+    Products live once in a catalog keyed by canonical URL, holding their
+    latest price; a search references catalog ids through a join table in
+    result order.
+
+    Every method is a coroutine that is safe to await on the event loop:
+    blocking client calls go through ``_call``, which runs them on the
+    default executor (the container's IO pool) with at most
+    ``max_concurrency`` in flight, and records their latency per operation.
+
+    A search keeps the query as typed, for display, next to its canonical
+    form, which is what ``products_for_query`` matches on.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.queries = get_query_canonicalizer()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._latency: Dict[str, LatencyStats] = {}
+        self.errors = 0
+        self.waiting = 0
+        self.in_flight = 0
+
+    async def _call(self, operation: str, func: Callable[..., Any], *args) -> Any:
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            stats = self._latency.get(operation)
+            if stats is None:
+                stats = self._latency[operation] = LatencyStats()
+            stats.record((time.perf_counter() - start) * 1000)
+
+    @abc.abstractmethod
+    async def recent_searches(self, limit: int = 10) -> List[Dict]:
+        """The latest searches, newest first."""
+
+    async def save_results(self, query: str, products: List[ProductRecord]) -> List[Dict]:
+        """Store one search and its products; returns the product rows as linked."""
+        return await self.save_many([(query, products)])
+
+    @abc.abstractmethod
+    async def save_many(self, searches: Sequence[Tuple[str, List[ProductRecord]]]) -> List[Dict]:
+        """Store several searches with one bulk write per table (catalog rows are upserted)."""
+
+    @abc.abstractmethod
+    async def products_for_query(self, query: str) -> List[Dict]:
+        """Product rows of the most recent search for any spelling of ``query``.
+
+        Each row also has the search's ``search_id``, ``query`` and
+        ``searched_at`` time.
+        """
+
+    @abc.abstractmethod
+    async def products_for_search(self, search_id: int) -> List[Dict]:
+        """Product rows of one search, shaped like ``products_for_query``'s."""
+
+    @abc.abstractmethod
+    async def catalog_id(self, url: str) -> Optional[int]:
+        """Catalog id of the listing at canonical ``url``, if it has been seen."""
+
+    async def close(self):
+        pass
+
+    def snapshot(self) -> Dict:
+        return {
+            "backend": type(self).__name__,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "errors": self.errors,
+            "latency": {operation: stats.snapshot() for operation, stats in self._latency.items()},
+        }
@@ -0,0 +1,186 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..config import DB_MAX_CONCURRENCY, SQLITE_DB_PATH
+from ..models.product_record import BASE_FIELDS, ProductRecord
+from .base import SearchRepository, catalog_rows
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    id INTEGER PRIMARY KEY,
+    query TEXT NOT NULL,
+    -- Canonical form of query, for lookups
+    query_key TEXT,
+    results_count INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS searches_created_at ON searches (created_at);
+
+-- One row per listing (canonical URL), holding its latest price
+CREATE TABLE IF NOT EXISTS catalog_products (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    price REAL,
+    currency TEXT,
+    price_usd REAL,
+    price_kes REAL,
+    description TEXT,
+    source TEXT,
+    first_seen TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    last_seen TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+-- A search's results in order; clustered on the primary key, so reading a
+-- search's product ids touches only this table's b-tree
+CREATE TABLE IF NOT EXISTS search_products (
+    search_id INTEGER NOT NULL REFERENCES searches (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    product_id INTEGER NOT NULL REFERENCES catalog_products (id),
+    PRIMARY KEY (search_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS search_products_product_id ON search_products (product_id);
+"""
+# Created after the migration below, which adds query_key to older files
+_QUERY_KEY_INDEX = "CREATE INDEX IF NOT EXISTS searches_query_key_created_at ON searches (query_key, created_at)"
+
+# Fixed statement texts, so each connection's statement cache prepares
+# them once and reuses them
+_INSERT_SEARCH = "INSERT INTO searches (query, query_key, results_count) VALUES (?, ?, ?)"
+# A listing seen again keeps its id and first_seen and takes the new values
+_UPSERT_PRODUCT = (
+    f"INSERT INTO catalog_products ({', '.join(BASE_FIELDS)}) "
+    f"VALUES ({', '.join('?' for _ in BASE_FIELDS)}) "
+    f"ON CONFLICT (url) DO UPDATE SET "
+    f"{', '.join(f'{field} = excluded.{field}' for field in BASE_FIELDS if field != 'url')}, "
+    f"last_seen = excluded.last_seen"
+)
+# Below SQLite's host parameter limit
+_ID_LOOKUP_CHUNK = 500
+_INSERT_LINK = "INSERT INTO search_products (search_id, position, product_id) VALUES (?, ?, ?)"
+_CATALOG_ID = "SELECT id FROM catalog_products WHERE url = ?"
+_RECENT_SEARCHES = "SELECT * FROM searches ORDER BY created_at DESC, id DESC LIMIT ?"
+# A search's product rows in result order, with the search's id, query and time
+_SEARCH_ROWS = """
+SELECT catalog_products.*, search_products.search_id, searches.query, searches.created_at AS searched_at
+FROM search_products
+JOIN catalog_products ON catalog_products.id = search_products.product_id
+JOIN searches ON searches.id = search_products.search_id
+WHERE search_products.search_id = {search_id}
+ORDER BY search_products.position
+"""
+_SEARCH_PRODUCTS = _SEARCH_ROWS.format(
+    search_id="(SELECT id FROM searches WHERE query_key = ? ORDER BY created_at DESC, id DESC LIMIT 1)"
+)
+_SEARCH_PRODUCTS_BY_ID = _SEARCH_ROWS.format(search_id="?")
+
+
+class SqliteSearchRepository(SearchRepository):
+    """Searches and products in a local SQLite file (WAL mode).
+
+    Same operations and row shapes as the Supabase repository, with no
+    network or credentials. Each IO thread opens its own connection, so
+    reads run in parallel under WAL while writers take turns on the
+    database lock.
+    """
+
+    def __init__(self, path: str = SQLITE_DB_PATH, max_concurrency: int = DB_MAX_CONCURRENCY):
+        super().__init__(max_concurrency)
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            self._migrate(conn)
+            conn.execute(_QUERY_KEY_INDEX)
+        logger.info(f"Using SQLite storage at {path}")
+
+    def _migrate(self, conn: sqlite3.Connection):
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(searches)")}
+        if "query_key" not in columns:
+            # Older files stored the canonical key in query itself
+            conn.execute("ALTER TABLE searches ADD COLUMN query_key TEXT")
+            conn.execute("UPDATE searches SET query_key = query")
+            conn.execute("DROP INDEX IF EXISTS searches_query_created_at")
+            logger.info("Added query_key to the searches table")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, cached_statements=64)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _recent_searches(self, limit: int) -> List[Dict]:
+        return [dict(row) for row in self._connect().execute(_RECENT_SEARCHES, (limit,))]
+
+    def _catalog_ids(self, conn: sqlite3.Connection, urls: List[str]) -> Dict[str, int]:
+        ids = {}
+        for start in range(0, len(urls), _ID_LOOKUP_CHUNK):
+            chunk = urls[start:start + _ID_LOOKUP_CHUNK]
+            placeholders = ', '.join('?' for _ in chunk)
+            ids.update(conn.execute(f"SELECT url, id FROM catalog_products WHERE url IN ({placeholders})", chunk))
+        return ids
+
+    def _save_many(self, searches: Sequence[Tuple[str, List[ProductRecord]]]) -> List[Dict]:
+        conn = self._connect()
+        catalog, links = catalog_rows(searches)
+        rows = []
+        # One transaction for every search, catalog upsert and link
+        with conn:
+            search_ids = [conn.execute(_INSERT_SEARCH, (query, self.queries.canonicalize(query), len(products))).lastrowid for query, products in searches]
+            conn.executemany(_UPSERT_PRODUCT, [tuple(row[field] for field in BASE_FIELDS) for row in catalog])
+            ids = self._catalog_ids(conn, [row["url"] for row in catalog])
+            by_url = {row["url"]: row for row in catalog}
+            link_rows = []
+            for search_id, urls in zip(search_ids, links):
+                for position, url in enumerate(urls):
+                    link_rows.append((search_id, position, ids[url]))
+                    rows.append({**by_url[url], "id": ids[url], "search_id": search_id})
+            conn.executemany(_INSERT_LINK, link_rows)
+        return rows
+
+    def _products_for_query(self, query: str) -> List[Dict]:
+        return [dict(row) for row in self._connect().execute(_SEARCH_PRODUCTS, (self.queries.canonicalize(query),))]
+
+    def _products_for_search(self, search_id: int) -> List[Dict]:
+        return [dict(row) for row in self._connect().execute(_SEARCH_PRODUCTS_BY_ID, (search_id,))]
+
+    def _catalog_id(self, url: str) -> Optional[int]:
+        row = self._connect().execute(_CATALOG_ID, (url,)).fetchone()
+        return row["id"] if row is not None else None
+
+    async def recent_searches(self, limit: int = 10) -> List[Dict]:
+        return await self._call("recent_searches", self._recent_searches, limit)
+
+    async def save_many(self, searches: Sequence[Tuple[str, List[ProductRecord]]]) -> List[Dict]:
+        return await self._call("save_many", self._save_many, searches)
+
+    async def products_for_query(self, query: str) -> List[Dict]:
+        return await self._call("products_for_query", self._products_for_query, query)
+
+    async def products_for_search(self, search_id: int) -> List[Dict]:
+        return await self._call("products_for_search", self._products_for_search, search_id)
+
+    async def catalog_id(self, url: str) -> Optional[int]:
+        return await self._call("catalog_id", self._catalog_id, url)
+
+    async def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,143 @@
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from supabase import Client
+
+from ..config import DB_MAX_CONCURRENCY
+from ..models.product_record import ProductRecord
+from .base import SearchRepository, catalog_rows
+
+logger = logging.getLogger(__name__)
+
+
+def _search_key(query: str, urls: List[str]) -> str:
+    """Key of a saved search: the same query and results map to the same row."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "\n".join([query, *urls])))
+
+
+class SupabaseSearchRepository(SearchRepository):
+    """Searches and products in Supabase.
+
+    Expects the tables ``searches`` (with a unique uuid ``search_key`` and the
+    canonical ``query_key`` that lookups match on),
+    ``catalog_products`` (unique ``url``, plus ``first_seen``/``last_seen``
+    timestamps) and ``search_products`` (``search_key``, ``position``,
+    ``product_id``; primary key on the first two). The supabase client is
+    synchronous; each ``.execute()`` runs on the IO thread pool so a database
+    round trip never blocks the event loop.
+    """
+
+    def __init__(self, client: Client, max_concurrency: int = DB_MAX_CONCURRENCY):
+        super().__init__(max_concurrency)
+        self.client = client
+
+    async def run(self, request: Any, operation: str) -> Any:
+        """Execute a prepared request, e.g. ``client.table("searches").select("*")``."""
+        return await self._call(operation, request.execute)
+
+    async def recent_searches(self, limit: int = 10) -> List[Dict]:
+        response = await self.run(
+            self.client.table("searches").select("*").order("created_at", desc=True).limit(limit),
+            "recent_searches",
+        )
+        return response.data
+
+    async def save_many(self, searches: Sequence[Tuple[str, List[ProductRecord]]]) -> List[Dict]:
+        # Every write is an upsert on a key computed here, and the search rows
+        # go last: a batch retried after a partial failure rewrites the same
+        # rows, and a search is only found once its links are stored
+        catalog, links = catalog_rows(searches)
+        seen_at = datetime.now(timezone.utc).isoformat()
+        by_url = {}
+        if catalog:
+            # A listing already in the catalog keeps its id and takes the new price
+            for row in catalog:
+                row["last_seen"] = seen_at
+            catalog_response = await self.run(
+                self.client.table("catalog_products").upsert(catalog, on_conflict="url"), "upsert_catalog"
+            )
+            by_url = {row["url"]: row for row in catalog_response.data}
+
+        keys = [_search_key(query, urls) for (query, _), urls in zip(searches, links)]
+        # One row per key: an upsert may not touch the same row twice
+        search_rows = {
+            key: {
+                "search_key": key,
+                "query": query,
+                "query_key": self.queries.canonicalize(query),
+                "results_count": len(products),
+                "created_at": seen_at,
+            }
+            for key, (query, products) in zip(keys, searches)
+        }
+        urls_by_key = dict(zip(keys, links))
+        link_rows = [
+            {"search_key": key, "position": position, "product_id": by_url[url]["id"]}
+            for key, urls in urls_by_key.items()
+            for position, url in enumerate(urls)
+        ]
+        if link_rows:
+            await self.run(
+                self.client.table("search_products").upsert(link_rows, on_conflict="search_key,position"),
+                "upsert_search_products",
+            )
+
+        search_response = await self.run(
+            self.client.table("searches").upsert(list(search_rows.values()), on_conflict="search_key"),
+            "upsert_searches",
+        )
+        search_ids = {row["search_key"]: row["id"] for row in search_response.data or []}
+        return [
+            {**by_url[url], "search_id": search_ids.get(key)}
+            for key, urls in zip(keys, links)
+            for url in urls
+        ]
+
+    async def _search_rows(self, searches: List[Dict]) -> List[Dict]:
+        if not searches:
+            return []
+        search = searches[0]
+        # Catalog rows embedded through the search_products foreign key
+        links_response = await self.run(
+            self.client.table("search_products")
+            .select("catalog_products(*)")
+            .eq("search_key", search["search_key"])
+            .order("position"),
+            "search_products",
+        )
+        return [
+            {
+                **link["catalog_products"],
+                "search_id": search["id"],
+                "query": search["query"],
+                "searched_at": search["created_at"],
+            }
+            for link in links_response.data
+        ]
+
+    async def products_for_query(self, query: str) -> List[Dict]:
+        search_response = await self.run(
+            self.client.table("searches")
+            .select("id, search_key, query, created_at")
+            .eq("query_key", self.queries.canonicalize(query))
+            .order("created_at", desc=True)
+            .limit(1),
+            "find_search",
+        )
+        return await self._search_rows(search_response.data)
+
+    async def products_for_search(self, search_id: int) -> List[Dict]:
+        search_response = await self.run(
+            self.client.table("searches").select("id, search_key, query, created_at").eq("id", search_id).limit(1),
+            "get_search",
+        )
+        return await self._search_rows(search_response.data)
+
+    async def catalog_id(self, url: str) -> Optional[int]:
+        response = await self.run(
+            self.client.table("catalog_products").select("id").eq("url", url).limit(1),
+            "catalog_id",
+        )
+        return response.data[0]["id"] if response.data else None
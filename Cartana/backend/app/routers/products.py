@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import json
 import logging
-from ..models.product import SearchRequest, SearchResponse, ProductReponse
+import time
+from ..models.product import PriceHistoryResponse, PricePoint, SearchRequest, SearchResponse
+from ..container import ServiceContainer, get_product_service, get_services
 from ..services.product_services import ProductService
+from ..utils.url_canonicalizer import canonical_url
 from datetime import datetime
 
 router = APIRouter(prefix="/products", tags=["products"])
@@ -12,10 +17,13 @@ logger = logging.getLogger(__name__)
 @router.post("/search", response_model=SearchResponse, status_code=status.HTTP_200_OK)
 async def search_products(
     request: SearchRequest,
-    product_service: ProductService = Depends(lambda: ProductService())
+    deadline_ms: Optional[int] = Query(None, ge=50, le=60000),
+    product_service: ProductService = Depends(get_product_service)
 ):
     """
-    Search for products across multiple e-commerce platforms
+    Search for products across multiple e-commerce platforms.
+    With deadline_ms, retailers still running when it expires are cancelled
+    and whatever finished is returned, with a status per source
     """
     try:
         # Validate and sanitize the query
@@ -26,17 +34,16 @@ async def search_products(
                 detail="Search query cannot be empty"
             )
         
-        # Call the search function (NO await, because it returns a DataFrame)
-        products = await product_service.search_and_save_products(query)
-        print(f"Type of products: {type(products)}")  # Debugging
+        # Products plus a status per retailer
+        products, sources = await product_service.search_with_status(query, deadline_ms)
         
-        # If format_products_for_response is async, keep `await`, otherwise remove it
         formatted_products = await product_service.format_products_for_response(products)
 
         return SearchResponse(
             query=query,
             timestamp=datetime.now(),
-            products=formatted_products
+            products=formatted_products,
+            sources=sources
         )
     
     except Exception as e:
@@ -45,3 +52,75 @@ async def search_products(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error searching products: {str(e)}"
         )
+
+
+
+@router.post("/search/stream", status_code=status.HTTP_200_OK)
+async def stream_search_products(
+    request: SearchRequest,
+    deadline_ms: Optional[int] = Query(None, ge=50, le=60000),
+    product_service: ProductService = Depends(get_product_service)
+):
+    """
+    Stream search results as NDJSON: one line per retailer as soon as it
+    finishes, then a final line with every product in sorted order
+    """
+    query = request.query.strip()
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query cannot be empty"
+        )
+
+    async def ndjson():
+        try:
+            async for message in product_service.stream_search(query, deadline_ms):
+                yield json.dumps(message) + "\n"
+        except Exception as e:
+            logger.error(f"Error streaming products: {str(e)}")
+            yield json.dumps({"event": "error", "detail": f"Error searching products: {str(e)}"}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/price-history", response_model=PriceHistoryResponse, status_code=status.HTTP_200_OK)
+async def product_price_history(
+    product_id: Optional[int] = Query(None, ge=1),
+    url: Optional[str] = Query(None, max_length=2048),
+    days: int = Query(90, ge=1, le=3650),
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Price observations of one catalog product over the last ``days`` days,
+    oldest first. Identify the product by catalog id or by any link to the
+    listing (tracking parameters are ignored)
+    """
+    if services.price_history is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Price history is disabled")
+    if product_id is None:
+        if not url:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Pass product_id or url"
+            )
+        product_id = await services.repository.catalog_id(canonical_url(url))
+        if product_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+    until = time.time()
+    since = until - days * 86400
+    points = await services.price_history.get_history(product_id, since, until)
+    prices = [price for _, price, _ in points]
+    return PriceHistoryResponse(
+        product_id=product_id,
+        since=datetime.fromtimestamp(since),
+        until=datetime.fromtimestamp(until),
+        points=[
+            PricePoint(timestamp=datetime.fromtimestamp(timestamp), price=price, currency=currency)
+            for timestamp, price, currency in points
+        ],
+        min_price=min(prices) if prices else None,
+        max_price=max(prices) if prices else None,
+        latest_price=prices[-1] if prices else None,
+        change_pct=round((prices[-1] - prices[0]) / prices[0] * 100, 2) if prices and prices[0] else None,
+    )
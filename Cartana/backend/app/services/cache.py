@@ -0,0 +1,303 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from ..config import (
+    CACHE_DISK_MAX_BYTES,
+    CACHE_DISK_PATH,
+    CACHE_HARD_TTL,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_RESULTS,
+    CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Values are JSON-compatible; their encoded size is what both tiers account
+# for, and the encoded bytes are what the disk tier stores.
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def _decode(blob: bytes) -> Any:
+    return json.loads(blob)
+
+
+class CacheEntry(NamedTuple):
+    """A cached value with its soft (fresh_until) and hard (expires_at) expiry."""
+
+    value: Any
+    fresh_until: float
+    expires_at: float
+
+    @property
+    def stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+
+class MemoryCache:
+    """In-process LRU with per-entry expiry, bounded by entry count and bytes."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        # key -> (entry, size), least recently used first
+        self._entries: "OrderedDict[str, Tuple[CacheEntry, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry, fresh or stale, and mark it recently used."""
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        entry = item[0]
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry, size: int):
+        if size > self.max_bytes:
+            # Would evict everything else and still not fit
+            self.delete(key)
+            return
+        self.delete(key)
+        self._entries[key] = (entry, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        if key in self._entries:
+            self._remove(key)
+
+    def items(self) -> Iterator[Tuple[str, CacheEntry]]:
+        """Unexpired entries, least recently used first."""
+        now = time.time()
+        for key, (entry, _) in list(self._entries.items()):
+            if entry.expires_at > now:
+                yield key, entry
+
+    def _remove(self, key: str):
+        _, size = self._entries.pop(key)
+        self.bytes -= size
+
+
+class DiskCache:
+    """SQLite-backed tier that survives restarts, bounded by total bytes.
+
+    Calls are blocking; TieredCache runs them in the default executor.
+    """
+
+    def __init__(self, path: str = CACHE_DISK_PATH, max_bytes: int = CACHE_DISK_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(cache)")]
+        if columns and "fresh_until" not in columns:
+            # Written by an older version; the contents are disposable
+            self._conn.execute("DROP TABLE cache")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, fresh_until REAL NOT NULL,"
+            " expires_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        self._conn.commit()
+        self.bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float, float]]:
+        """Return (blob, fresh_until, expires_at) for an unexpired entry."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, fresh_until, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] <= time.time():
+                self._delete(key)
+                self._conn.commit()
+                return None
+            return row
+
+    def set(self, key: str, blob: bytes, fresh_until: float, expires_at: float):
+        with self._lock:
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO cache (key, value, fresh_until, expires_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, fresh_until, expires_at, len(blob)),
+            )
+            self.bytes += len(blob)
+            if self.bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _delete(self, key: str):
+        row = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.bytes -= row[0]
+
+    def _evict(self):
+        """Drop expired entries, then the ones closest to expiry, until under budget."""
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        self.bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM cache ORDER BY expires_at"
+        ).fetchall():
+            if self.bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.bytes -= size
+            self.evictions += 1
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """Memory LRU in front of the disk tier, checked before the database or a scrape.
+
+    A memory miss falls through to disk; a disk hit is promoted back into
+    memory with its remaining TTL. Writes go to both tiers.
+
+    Entries are fresh for ``ttl`` seconds and kept until ``hard_ttl``;
+    callers serve stale entries and refresh them in the background.
+    """
+
+    def __init__(
+        self,
+        memory: Optional[MemoryCache] = None,
+        disk: Optional[DiskCache] = None,
+        ttl: float = CACHE_TTL,
+        hard_ttl: float = CACHE_HARD_TTL,
+    ):
+        self.memory = memory or MemoryCache()
+        self.disk = disk
+        self.ttl = ttl
+        self.hard_ttl = max(ttl, hard_ttl)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def _run(self, func, *args):
+        # Default executor: the app's IO thread pool (see ServiceContainer)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory_hits += 1
+            return self._counted(entry)
+
+        if self.disk is not None:
+            try:
+                row = await self._run(self.disk.get, key)
+            except sqlite3.Error as e:
+                logger.error(f"Disk cache read failed for {key!r}: {e}")
+                row = None
+            if row is not None:
+                blob, fresh_until, expires_at = row
+                entry = CacheEntry(_decode(blob), fresh_until, expires_at)
+                self.memory.set(key, entry, len(blob))
+                self.disk_hits += 1
+                return self._counted(entry)
+
+        self.misses += 1
+        return None
+
+    def _counted(self, entry: CacheEntry) -> CacheEntry:
+        if entry.stale:
+            self.stale_hits += 1
+        return entry
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, stored_at: Optional[float] = None):
+        """Store ``value``, fresh for ``ttl`` seconds (default: the cache's ttl).
+
+        ``stored_at`` dates a value produced earlier, e.g. rows loaded from
+        the database: it is fresh for ``ttl`` from then, possibly already
+        stale, but still kept for the hard TTL from now so it can be served
+        while it is refreshed.
+        """
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        produced = now if stored_at is None else min(stored_at, now)
+        entry = CacheEntry(value, produced + ttl, now + max(ttl, self.hard_ttl))
+        blob = _encode(value)
+        self.memory.set(key, entry, len(blob))
+        if self.disk is not None:
+            try:
+                await self._run(self.disk.set, key, blob, entry.fresh_until, entry.expires_at)
+            except sqlite3.Error as e:
+                logger.error(f"Disk cache write failed for {key!r}: {e}")
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+    def snapshot(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.bytes,
+            "memory_evictions": self.memory.evictions,
+            "memory_expirations": self.memory.expirations,
+            "disk_bytes": self.disk.bytes if self.disk is not None else None,
+            "disk_evictions": self.disk.evictions if self.disk is not None else None,
+        }
+
+
+_shared_cache: Optional[TieredCache] = None
+
+
+def get_search_cache() -> Optional[TieredCache]:
+    """Return the process-wide result cache, or None when CACHE_RESULTS is off."""
+    global _shared_cache
+    if not CACHE_RESULTS:
+        return None
+    if _shared_cache is None:
+        disk = DiskCache() if CACHE_DISK_PATH else None
+        _shared_cache = TieredCache(disk=disk)
+    return _shared_cache
+
+
+def close_search_cache():
+    global _shared_cache
+    if _shared_cache is not None:
+        _shared_cache.close()
+        _shared_cache = None
@@ -0,0 +1,402 @@
+import re
+import logging
+import numpy as np
+from lxml import etree, html as lxml_html
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urljoin
+
+from ..models.product_record import ProductRecord
+from ..utils.helpers import clean_price, clean_prices
+
+logger = logging.getLogger(__name__)
+
+# Selector syntax
+# ---------------
+# Selectors are written as a small CSS subset and compiled once to XPath:
+#   "div.s-item__info"                          tag + class token
+#   "div[data-component-type=s-search-result]"  attribute equals
+#   "a[href]"                                   attribute present
+#   "h3 a span"                                 descendant steps
+#   "a.s-item__link@href"                       read an attribute instead of text
+# Anything starting with "xpath:" is used as raw XPath relative to the node,
+# e.g. "xpath:ancestor::a[@href][1]/@href".
+# A list of selectors is a fallback chain: the first one that matches wins.
+
+_STEP_RE = re.compile(r'^(?P<tag>[\w*-]*)(?P<rest>(?:\.[\w-]+|\[[^\]]+\])*)$')
+_PART_RE = re.compile(r'\.([\w-]+)|\[([^\]=]+)(?:=([^\]]*))?\]')
+
+
+def _xpath_literal(value: str) -> str:
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    return "concat('" + value.replace("'", "', \"'\", '") + "')"
+
+
+def css_to_xpath(selector: str) -> str:
+    """Translate the selector subset above into a relative XPath expression."""
+    steps = []
+    for step in selector.split():
+        match = _STEP_RE.match(step)
+        if not match:
+            raise ValueError(f"Unsupported selector step: {step!r} in {selector!r}")
+        predicates = []
+        for class_name, attr, value in _PART_RE.findall(match.group('rest')):
+            if class_name:
+                predicates.append(
+                    f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+                )
+            elif value:
+                value = value.strip().strip('"\'')
+                predicates.append(f"@{attr.strip()}={_xpath_literal(value)}")
+            else:
+                predicates.append(f"@{attr.strip()}")
+        step_xpath = match.group('tag') or '*'
+        if predicates:
+            step_xpath += '[' + ' and '.join(predicates) + ']'
+        steps.append(step_xpath)
+    return './/' + '//'.join(steps)
+
+
+def css_to_match_xpath(selector: str) -> str:
+    """XPath that is true when the context node itself matches ``selector``.
+
+    Used while streaming, where containers are tested as they close instead
+    of being searched for from the document root.
+    """
+    steps = css_to_xpath(selector)[len('.//'):].split('//')
+    ancestors = ''
+    for step in steps[:-1]:
+        ancestors = f'[ancestor::{step}{ancestors}]'
+    return f'boolean(self::{steps[-1]}{ancestors})'
+
+
+class FieldSelector:
+    """A compiled fallback chain of selectors returning text or an attribute."""
+
+    def __init__(self, selectors: Union[str, Sequence[str]]):
+        if isinstance(selectors, str):
+            selectors = [selectors]
+        self.selectors = list(selectors)
+        self.compiled = [self._compile(selector) for selector in self.selectors]
+
+    @staticmethod
+    def _compile(selector: str) -> etree.XPath:
+        if selector.startswith('xpath:'):
+            return etree.XPath(selector[len('xpath:'):])
+        selector, _, attribute = selector.partition('@')
+        xpath = css_to_xpath(selector)
+        if attribute:
+            xpath += f'/@{attribute}'
+        return etree.XPath(xpath)
+
+    def all(self, node) -> list:
+        """Matches of the first selector in the chain that matches anything."""
+        for xpath in self.compiled:
+            matches = xpath(node)
+            if matches:
+                return matches
+        return []
+
+    def texts(self, node) -> List[str]:
+        """Text (or attribute value) of every match of the first matching selector."""
+        return [match if isinstance(match, str) else match.text_content() for match in self.all(node)]
+
+    def first(self, node) -> Optional[str]:
+        """Text (or attribute value) of the first match, or None."""
+        for xpath in self.compiled:
+            matches = xpath(node)
+            if matches:
+                match = matches[0]
+                if isinstance(match, str):
+                    return str(match)
+                return match.text_content()
+        return None
+
+
+class FieldSpec:
+    """An optional field: its selector plus how the matched text becomes a value.
+
+    In the config a field is either a selector (or fallback list) or a
+    mapping with:
+      select  the selector(s)
+      join    join the text of every match with this separator, instead of
+              taking the first match
+      strip   characters removed from both ends, e.g. "()" for "(12)"
+      type    "text" (default) or "price", parsed with clean_price
+    """
+
+    TYPES = ('text', 'price')
+
+    def __init__(self, spec: Union[str, Sequence[str], Dict], currency: str = 'USD'):
+        if isinstance(spec, dict):
+            selector = spec['select']
+            self.join = spec.get('join')
+            self.strip = spec.get('strip')
+            self.type = spec.get('type', 'text')
+        else:
+            selector, self.join, self.strip, self.type = spec, None, None, 'text'
+        if self.type not in self.TYPES:
+            raise ValueError(f"Unknown field type {self.type!r} (expected one of {', '.join(self.TYPES)})")
+        self.selector = FieldSelector(selector)
+        self.currency = currency
+
+    def value(self, node) -> Union[str, float, None]:
+        if self.join is not None:
+            parts = [text.strip() for text in self.selector.texts(node)]
+            text = self.join.join(part for part in parts if part)
+        else:
+            text = self.selector.first(node)
+        if text is None:
+            return None
+        text = text.strip()
+        if self.strip:
+            text = text.strip(self.strip).strip()
+        if not text:
+            return None
+        if self.type == 'price':
+            return clean_price(text, self.currency)[0]
+        return text
+
+
+class RetailerExtractor:
+    """Precompiled container/title/price/url selectors for one retailer.
+
+    Each page is parsed into a single lxml tree; the container query runs
+    once and the field queries run relative to each container.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        container: Union[str, Sequence[str]],
+        title: Union[str, Sequence[str]],
+        price: Union[str, Sequence[str]],
+        url: Union[str, Sequence[str]],
+        base_url: Optional[str] = None,
+        currency: str = 'USD',
+        extra: Optional[Dict[str, Union[str, Sequence[str], Dict]]] = None,
+        max_products: Optional[int] = None,
+        description: Union[str, Sequence[str], Dict, None] = None,
+    ):
+        self.source = source
+        self.container = FieldSelector(container)
+        self.title = FieldSelector(title)
+        self.price = FieldSelector(price)
+        self.url = FieldSelector(url)
+        self.base_url = base_url
+        self.currency = currency
+        # Optional fields: the description and retailer-specific ones (sku, review_score, ...)
+        self.description = FieldSpec(description, currency) if description else None
+        self.extra = {name: FieldSpec(spec, currency) for name, spec in (extra or {}).items()}
+        # Only the first max_products records of a page are used
+        self.max_products = max_products
+        self.container_matchers = self._compile_matchers(self.container.selectors)
+
+    @staticmethod
+    def _compile_matchers(selectors: List[str]) -> Optional[List[Tuple[Optional[str], etree.XPath]]]:
+        """Per-node tests for the container chain, or None if it can't be streamed.
+
+        Each test is paired with the tag of the selector's last step so most
+        nodes are rejected with a string compare instead of an XPath call.
+        """
+        if any(selector.startswith('xpath:') for selector in selectors):
+            return None
+        matchers = []
+        for selector in selectors:
+            tag = _STEP_RE.match(selector.split()[-1]).group('tag')
+            matchers.append((tag if tag not in ('', '*') else None, etree.XPath(css_to_match_xpath(selector))))
+        return matchers
+
+    @property
+    def can_stream(self) -> bool:
+        return self.container_matchers is not None
+
+    def containers(self, root) -> list:
+        return self.container.all(root)
+
+    def _fields(self, node) -> Optional[Tuple[str, str, str]]:
+        """Raw title, price text and url of a container, or None if one is missing."""
+        title = self.title.first(node)
+        price_text = self.price.first(node)
+        url = self.url.first(node)
+        if not (title and price_text and url):
+            return None
+        return title, price_text, url
+
+    def _record(self, node, title: str, price: float, currency: str, url: str) -> ProductRecord:
+        extra = {}
+        for name, field in self.extra.items():
+            value = field.value(node)
+            if value is not None:
+                extra[name] = value
+        description = self.description.value(node) if self.description else None
+        return ProductRecord(
+            title=title.strip(),
+            price=price,
+            currency=currency,
+            source=self.source,
+            url=urljoin(self.base_url, url) if self.base_url else url,
+            description=description or '',
+            extra=extra,
+        )
+
+    def extract_container(self, node) -> Optional[ProductRecord]:
+        """Build one product record from a container node, or None if incomplete."""
+        fields = self._fields(node)
+        if fields is None:
+            return None
+        title, price_text, url = fields
+        price, currency = clean_price(price_text, self.currency)
+        if price is None:
+            return None
+        return self._record(node, title, price, currency, url)
+
+    def extract(self, html: bytes) -> List[ProductRecord]:
+        """Parse a page and return its product records.
+
+        Prices for the whole page are parsed in one clean_prices call.
+        """
+        if not html:
+            return []
+        root = lxml_html.document_fromstring(html)
+        containers = self.containers(root)
+        logger.debug(f"Found {len(containers)} products on {self.source}")
+        candidates = []
+        for node in containers:
+            fields = self._fields(node)
+            if fields is not None:
+                candidates.append((node, fields))
+        prices, currencies = clean_prices([fields[1] for _, fields in candidates], self.currency)
+
+        results = []
+        for (node, (title, _, url)), price, currency in zip(candidates, prices, currencies):
+            if np.isnan(price):
+                continue
+            results.append(self._record(node, title, float(price), currency, url))
+            if self.max_products and len(results) >= self.max_products:
+                break
+        return results
+
+    def stream(self) -> 'StreamingExtraction':
+        """Start an incremental parse of one page."""
+        return StreamingExtraction(self)
+
+
+class StreamingExtraction:
+    """Incremental parse of one page, fed chunk by chunk as it downloads.
+
+    Containers are matched as their end tag is parsed, so each product record
+    is available as soon as its card has arrived. Once ``max_products``
+    records exist, ``done`` is set and the caller can drop the connection
+    without reading the rest of the page.
+
+    Fallback chains keep the same meaning as in ``RetailerExtractor.extract``:
+    records from the first container selector are emitted straight away;
+    the others are held back and only used if the first never matches.
+    """
+
+    def __init__(self, extractor: RetailerExtractor):
+        if not extractor.can_stream:
+            raise ValueError(f"Container selectors for {extractor.source} cannot be streamed")
+        self.extractor = extractor
+        tags = {tag for tag, _ in extractor.container_matchers}
+        # Let libxml2 skip events for unrelated tags when every selector names one
+        self.parser = etree.HTMLPullParser(events=('end',), tag=None if None in tags else list(tags))
+        self.parser.set_element_class_lookup(lxml_html.HtmlElementClassLookup())
+        self.results: List[ProductRecord] = []
+        self.bytes_fed = 0
+        self.done = False
+        self._matched = [False] * len(extractor.container_matchers)
+        self._held: List[List[ProductRecord]] = [[] for _ in extractor.container_matchers]
+
+    def feed(self, chunk: bytes) -> List[ProductRecord]:
+        """Parse the next chunk and return the records it completed."""
+        if self.done:
+            return []
+        self.bytes_fed += len(chunk)
+        self.parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[ProductRecord]:
+        """Finish the parse and return the page's records."""
+        if not self.done:
+            try:
+                self.parser.close()
+            except etree.XMLSyntaxError:
+                # Nothing was fed (empty body)
+                pass
+            self._drain()
+            self.done = True
+        if not self._matched[0]:
+            # Same fallback rule as a full parse: first selector that matched wins
+            for index, matched in enumerate(self._matched):
+                if matched:
+                    return self._held[index][:self.extractor.max_products or None]
+        return self.results
+
+    def release(self):
+        """Drop the parser and what is left of its tree.
+
+        Call it on the thread that fed the parser: lxml trees must not be
+        freed on another thread.
+        """
+        self.parser = None
+
+    def _drain(self) -> List[ProductRecord]:
+        extractor = self.extractor
+        new_records = []
+        for _, node in self.parser.read_events():
+            indexes = [
+                index for index, (tag, matcher) in enumerate(extractor.container_matchers)
+                if (tag is None or node.tag == tag) and matcher(node)
+            ]
+            if not indexes:
+                continue
+            for index in indexes:
+                self._matched[index] = True
+            record = extractor.extract_container(node)
+            if indexes[0] == 0:
+                # Its fields are read: free the card and everything parsed
+                # before it, so the tree stays small however long the page.
+                # Fallback containers around it are never used once the
+                # first selector has matched.
+                _discard(node)
+            if record is None:
+                continue
+            for index in indexes:
+                if index == 0:
+                    self.results.append(record)
+                    new_records.append(record)
+                else:
+                    self._held[index].append(record)
+            if extractor.max_products and len(self.results) >= extractor.max_products:
+                self.done = True
+                break
+        return new_records
+
+
+def _discard(node):
+    """Clear a parsed element and remove its earlier siblings from the tree."""
+    node.clear(keep_tail=True)
+    parent = node.getparent()
+    while node.getprevious() is not None:
+        del parent[0]
+
+
+def build_extractor(spec: Dict) -> RetailerExtractor:
+    """Compile an extractor from one retailer entry of the registry config."""
+    selectors = spec['selectors']
+    return RetailerExtractor(
+        spec['name'],
+        container=selectors['container'],
+        title=selectors['title'],
+        price=selectors['price'],
+        url=selectors['url'],
+        base_url=spec.get('base_url'),
+        currency=spec.get('currency', 'USD'),
+        extra=selectors.get('extra'),
+        max_products=spec.get('max_products'),
+        description=selectors.get('description'),
+    )
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from ..config import CURRENCY_API_URL, FX_CACHE_PATH, FX_FALLBACK_RATES, FX_REFRESH_INTERVAL
+from .http_client import HttpClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+
+class FxService:
+    """App-lifetime exchange rate table (units of each currency per USD).
+
+    The whole table is loaded once and refreshed in the background every
+    ``refresh_interval`` seconds, so a search never waits on the FX API.
+    The last good table is written to disk and read back on a cold start;
+    if neither the API nor the disk copy is available, FX_FALLBACK_RATES
+    is used.
+    """
+
+    def __init__(
+        self,
+        url: str = CURRENCY_API_URL,
+        refresh_interval: float = FX_REFRESH_INTERVAL,
+        cache_path: Optional[str] = FX_CACHE_PATH,
+        http_client: Optional[HttpClient] = None,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.cache_path = cache_path
+        self.http_client = http_client
+        self.rates: Dict[str, float] = {}
+        self.updated_at: Optional[float] = None
+        self.origin = "none"
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def http(self) -> HttpClient:
+        return self.http_client or get_http_client()
+
+    def _set_rates(self, rates: Dict[str, float], updated_at: float, origin: str):
+        rates = {code.upper(): float(rate) for code, rate in rates.items() if rate}
+        rates['USD'] = 1.0
+        self.rates = rates
+        self.updated_at = updated_at
+        self.origin = origin
+
+    def load_cached(self) -> bool:
+        """Load the table saved by the last successful refresh."""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+            self._set_rates(data['rates'], data['updated_at'], "disk")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not read cached exchange rates from {self.cache_path}: {e}")
+            return False
+        logger.info(f"Loaded {len(self.rates)} cached exchange rates from {self.cache_path}")
+        return True
+
+    def _save_cached(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+                json.dump({"updated_at": self.updated_at, "rates": self.rates}, cache_file)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.error(f"Could not save exchange rates to {self.cache_path}: {e}")
+
+    def restore(self, rates: Dict[str, float], updated_at: float) -> bool:
+        """Use a table saved elsewhere (a warm restart snapshot) if it is newer."""
+        if not rates or (self.updated_at or 0) >= updated_at:
+            return False
+        self._set_rates(rates, updated_at, "snapshot")
+        return True
+
+    async def refresh(self) -> bool:
+        """Fetch the full rate table; keep the current one on failure."""
+        body = await self.http.fetch(self.url)
+        try:
+            if not body:
+                raise ValueError("empty response")
+            rates = json.loads(body)["rates"]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Error fetching exchange rates: {e}")
+            if not self.rates:
+                self._set_rates(FX_FALLBACK_RATES, time.time(), "fallback")
+            return False
+
+        self._set_rates(rates, time.time(), "network")
+        self._save_cached()
+        logger.info(f"Refreshed {len(self.rates)} exchange rates, USD to KES: {self.rate('KES')}")
+        return True
+
+    async def ensure_rates(self):
+        """Make sure some table is loaded (for scripts that skip start())."""
+        if not self.rates and not self.load_cached():
+            await self.refresh()
+
+    async def start(self):
+        """Load the disk copy (unless already restored), then keep the table fresh in the background."""
+        if not self.rates and not self.load_cached():
+            await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            age = time.time() - (self.updated_at or 0)
+            if self.origin != "network" or age >= self.refresh_interval:
+                await self.refresh()
+                age = 0
+            await asyncio.sleep(max(1.0, self.refresh_interval - age))
+
+    def rate(self, currency: str) -> Optional[float]:
+        """Units of ``currency`` per USD, or None if unknown."""
+        return self.rates.get(currency)
+
+    def to_usd(self, amount: float, currency: str) -> float:
+        """Convert to USD; unknown currencies are treated as USD."""
+        return amount / self.rates.get(currency, 1.0)
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        return self.to_usd(amount, from_currency) * self.rates.get(to_currency, 1.0)
+
+    @property
+    def usd_to_kes(self) -> float:
+        return self.rates.get('KES', FX_FALLBACK_RATES['KES'])
+
+    def snapshot(self) -> Dict:
+        return {
+            "origin": self.origin,
+            "currencies": len(self.rates),
+            "usd_to_kes": self.rates.get('KES'),
+            "age_s": round(time.time() - self.updated_at, 1) if self.updated_at else None,
+        }
+
+
+_shared_fx: Optional[FxService] = None
+
+
+def get_fx_service() -> FxService:
+    """Return the process-wide FX service, creating it on first use."""
+    global _shared_fx
+    if _shared_fx is None:
+        _shared_fx = FxService()
+    return _shared_fx
@@ -0,0 +1,160 @@
+import httpx
+import logging
+from typing import AsyncIterator, Dict, Optional
+
+from ..config import (
+    HTTP_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2_ENABLED,
+)
+from .rate_limiter import RateLimiter, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+def _supported_encodings() -> str:
+    """Only advertise encodings httpx can actually decode in this environment."""
+    encodings = ['gzip', 'deflate']
+    try:
+        import brotli  # noqa: F401
+        encodings.append('br')
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append('br')
+        except ImportError:
+            pass
+    return ', '.join(encodings)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': _supported_encodings(),
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'DNT': '1',
+}
+
+
+class HttpClient:
+    """App-lifetime async HTTP client.
+
+    httpx keeps one keep-alive pool per origin, so every retailer host reuses
+    its TCP/TLS connections across searches instead of handshaking per request.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = HTTP_TIMEOUT,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE,
+        http2: bool = HTTP2_ENABLED,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.headers = dict(DEFAULT_HEADERS)
+        if headers:
+            self.headers.update(headers)
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = http2 and _http2_available()
+        if http2 and not self.http2:
+            logger.info("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        self.rate_limiter = rate_limiter
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Create the underlying client on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[bytes]:
+        """GET a page and return its decoded body bytes, or None on failure.
+
+        The body is read with ``aiter_bytes`` so gzip/deflate/br decompression
+        happens chunk by chunk while the response streams in.
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(url)
+        try:
+            async with self.client.stream("GET", url, headers=headers) as response:
+                logger.debug(f"Request to {url}: Status code {response.status_code}")
+                if response.status_code != 200:
+                    logger.warning(f"Request failed with status code: {response.status_code} for {url}")
+                    return None
+                chunks = [chunk async for chunk in response.aiter_bytes()]
+            return b"".join(chunks)
+
+        except httpx.HTTPError as e:
+            logger.error(f"Request error for {url}: {e}")
+            return None
+
+    async def stream(self, url: str, headers: Optional[Dict[str, str]] = None) -> AsyncIterator[bytes]:
+        """Yield decoded body chunks as they arrive off the socket.
+
+        Yields nothing for a non-200 response and stops early on a transport
+        error. Closing the generator before the body ends (wrap it in
+        ``contextlib.aclosing``) closes the response, so the rest of the page
+        is never downloaded.
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(url)
+        try:
+            async with self.client.stream("GET", url, headers=headers) as response:
+                logger.debug(f"Request to {url}: Status code {response.status_code}")
+                if response.status_code != 200:
+                    logger.warning(f"Request failed with status code: {response.status_code} for {url}")
+                    return
+                async for chunk in response.aiter_bytes():
+                    yield chunk
+
+        except httpx.HTTPError as e:
+            logger.error(f"Request error for {url}: {e}")
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+_shared_client: Optional[HttpClient] = None
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client, creating it on first use."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = HttpClient(rate_limiter=get_rate_limiter())
+    return _shared_client
+
+
+async def close_http_client():
+    """Close the process-wide HTTP client (called on app shutdown)."""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from ..config import (
+    NEGATIVE_CACHE_CAPACITY,
+    NEGATIVE_CACHE_ENABLED,
+    NEGATIVE_CACHE_ERROR_RATE,
+    NEGATIVE_CACHE_GENERATIONS,
+    NEGATIVE_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size set membership with no false negatives.
+
+    Sized for ``capacity`` keys at ``error_rate`` false positives; memory
+    does not grow with the number of keys added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class NegativeCache:
+    """Queries that recently returned no products from any retailer.
+
+    Keys go into the newest of ``generations`` Bloom filters. A new filter
+    is started every ``ttl / generations`` seconds (or when the newest one
+    reaches its capacity) and the oldest is dropped, so a key is remembered
+    for between ``ttl * (generations - 1) / generations`` and ``ttl``
+    seconds. A false positive, at roughly ``error_rate`` per lookup, makes
+    a query look empty until its generations expire.
+    """
+
+    def __init__(
+        self,
+        ttl: float = NEGATIVE_CACHE_TTL,
+        capacity: int = NEGATIVE_CACHE_CAPACITY,
+        error_rate: float = NEGATIVE_CACHE_ERROR_RATE,
+        generations: int = NEGATIVE_CACHE_GENERATIONS,
+    ):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.generations = max(2, generations)
+        self.interval = ttl / self.generations
+        self._filters: Deque[BloomFilter] = deque(maxlen=self.generations)
+        self._rotated_at = 0.0
+        self.added = 0
+        self.checks = 0
+        self.scrapes_avoided = 0
+        self.rotations = 0
+        self._rotate()
+
+    def _rotate(self):
+        # Sized per generation, so the error rate holds across the whole window
+        self._filters.append(BloomFilter(self.capacity, self.error_rate / self.generations))
+        self._rotated_at = time.monotonic()
+        self.rotations += 1
+
+    def _expire(self):
+        elapsed = time.monotonic() - self._rotated_at
+        if elapsed >= self.ttl:
+            # Idle for a full TTL: everything has expired
+            self._filters.clear()
+            self._rotate()
+            return
+        while elapsed >= self.interval:
+            self._rotate()
+            elapsed -= self.interval
+        self._rotated_at = time.monotonic() - elapsed
+
+    def add(self, key: str):
+        self._expire()
+        if self._filters[-1].full:
+            self._rotate()
+        self._filters[-1].add(key)
+        self.added += 1
+
+    def contains(self, key: str) -> bool:
+        """True if ``key`` (probably) came back empty within the TTL; counts a scrape avoided."""
+        self._expire()
+        self.checks += 1
+        if any(key in bloom for bloom in self._filters):
+            self.scrapes_avoided += 1
+            return True
+        return False
+
+    def snapshot(self) -> Dict:
+        return {
+            "added": self.added,
+            "checks": self.checks,
+            "scrapes_avoided": self.scrapes_avoided,
+            "rotations": self.rotations,
+            "generations": len(self._filters),
+            "keys_in_window": sum(bloom.count for bloom in self._filters),
+            "bytes": sum(len(bloom.bits) for bloom in self._filters),
+        }
+
+
+_shared_negative_cache: Optional[NegativeCache] = None
+
+
+def get_negative_cache() -> Optional[NegativeCache]:
+    """Return the process-wide negative cache, or None when it is disabled."""
+    global _shared_negative_cache
+    if not NEGATIVE_CACHE_ENABLED:
+        return None
+    if _shared_negative_cache is None:
+        _shared_negative_cache = NegativeCache()
+    return _shared_negative_cache
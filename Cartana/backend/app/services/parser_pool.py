@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from ..config import PARSER_WORKERS
+from .parsers import parse_page
+from ..models.product_record import ProductRecord
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_worker():
+    """Import the parsing stack once when a worker process starts."""
+    import lxml.html  # noqa: F401
+    from . import parsers  # noqa: F401
+
+
+def _noop() -> int:
+    return 0
+
+
+class ParserPool:
+    """CPU-bound HTML parsing stage, separate from the network I/O loop.
+
+    Fetches produce raw page bytes on the event loop; parsing runs in warm
+    worker processes so throughput scales with cores instead of the GIL.
+    With ``workers=0`` pages are parsed inline (handy for scripts and tests).
+    """
+
+    def __init__(self, workers: int = PARSER_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        if self._executor is None and self.workers > 0:
+            # spawn: forking a process that already runs an event loop and
+            # client threads is not safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+        return self._executor
+
+    async def warm_up(self):
+        """Start every worker now rather than on the first search."""
+        if self.executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self.executor, _noop) for _ in range(self.workers)
+        ])
+        logger.info(f"Parser pool ready with {self.workers} workers")
+
+    async def parse(self, spec: Dict, html: bytes) -> List[ProductRecord]:
+        """Parse one retailer page into product records.
+
+        ``spec`` is the retailer's registry entry; workers compile it once per
+        config version, so hot-reloaded selectors reach every process.
+        """
+        if self.executor is None:
+            return parse_page(spec, html)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, parse_page, spec, html)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+_shared_pool: Optional[ParserPool] = None
+
+
+def get_parser_pool() -> ParserPool:
+    """Return the process-wide parser pool, creating it on first use."""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = ParserPool()
+    return _shared_pool
+
+
+def shutdown_parser_pool():
+    global _shared_pool
+    if _shared_pool is not None:
+        _shared_pool.shutdown()
+        _shared_pool = None
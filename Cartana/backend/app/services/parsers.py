@@ -0,0 +1,27 @@
+from typing import Dict, List, Tuple
+
+from .extraction import RetailerExtractor, build_extractor
+from ..models.product_record import ProductRecord
+
+# Retailer pages are parsed here, away from network I/O. Every entry point is a
+# plain module-level callable taking raw page bytes so it can run inside a
+# ProcessPoolExecutor worker. parse_page uses lxml extractors compiled from
+# the retailer registry (app/retailers.yaml).
+
+# Compiled extractors per retailer, keyed by the config fingerprint so each
+# worker process compiles a retailer's selectors once per config version
+_extractors: Dict[str, Tuple[str, RetailerExtractor]] = {}
+
+
+def get_extractor(spec: Dict) -> RetailerExtractor:
+    """Return the compiled extractor for a registry entry, compiling on first use."""
+    cached = _extractors.get(spec['name'])
+    if cached is None or cached[0] != spec['fingerprint']:
+        cached = (spec['fingerprint'], build_extractor(spec))
+        _extractors[spec['name']] = cached
+    return cached[1]
+
+
+def parse_page(spec: Dict, html: bytes) -> List[ProductRecord]:
+    """Parse one retailer page into product records."""
+    return get_extractor(spec).extract(html)
@@ -0,0 +1,405 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import struct
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import (
+    PRICE_HISTORY_DIR,
+    PRICE_HISTORY_FLUSH_INTERVAL,
+    PRICE_HISTORY_FLUSH_ROWS,
+    PRICE_HISTORY_MAX_SEGMENTS,
+    PRICE_HISTORY_SEGMENT_ROWS,
+)
+from ..utils.metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+# Segment file layout (little-endian):
+#   magic (8s) | header length (I)
+#   header: JSON with the row count, time range, base timestamp, currency
+#           table, the segments it replaces (compaction) and each column's
+#           offset from the data start and length
+#   data (starts 8-byte aligned), one column after another, each aligned:
+#     product_ids (int64)     distinct products, sorted
+#     offsets (int64)         start of each product's run of rows, plus the end
+#     ts_deltas (uint32)      seconds since the product's previous observation,
+#                             or since base_ts for its first one
+#     prices (float64)
+#     currency_codes (uint8)  index into the currency table
+# Rows are sorted by (product_id, timestamp), so one product's history is a
+# contiguous run found by binary search, 13 bytes per observation.
+_MAGIC = b"CRTPHS01"
+_FILE_HEADER = struct.Struct("<8sI")
+_ALIGN = 8
+_COLUMNS = (
+    ("product_ids", np.int64),
+    ("offsets", np.int64),
+    ("ts_deltas", np.uint32),
+    ("prices", np.float64),
+    ("currency_codes", np.uint8),
+)
+_SEGMENT_NAME = re.compile(r"^segment-(\d+)\.phs$")
+
+# (product_id, timestamp, price, currency)
+Observation = Tuple[int, int, float, str]
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_segment(path: str, product_ids: np.ndarray, timestamps: np.ndarray, prices: np.ndarray,
+                  currencies: np.ndarray, replaces: Iterable[str] = ()) -> None:
+    """Write one segment from per-row columns (in any order); ``currencies`` is an array of strings."""
+    order = np.lexsort((timestamps, product_ids))
+    product_ids = product_ids[order]
+    timestamps = timestamps[order]
+    table, codes = np.unique(currencies, return_inverse=True)
+    if len(table) > 256:
+        raise ValueError(f"{len(table)} currencies do not fit a uint8 code")
+    codes = codes.astype(np.uint8)[order]
+
+    distinct, starts = np.unique(product_ids, return_index=True)
+    base_ts = int(timestamps.min()) if len(timestamps) else 0
+    previous = np.empty_like(timestamps)
+    previous[1:] = timestamps[:-1]
+    previous[starts] = base_ts
+    columns = {
+        "product_ids": distinct.astype(np.int64),
+        "offsets": np.append(starts, len(product_ids)).astype(np.int64),
+        "ts_deltas": (timestamps - previous).astype(np.uint32),
+        "prices": prices[order].astype(np.float64),
+        "currency_codes": codes,
+    }
+
+    layout = {}
+    offset = 0
+    for name, _ in _COLUMNS:
+        layout[name] = [offset, len(columns[name])]
+        offset = _aligned(offset + columns[name].nbytes)
+    header = {
+        "rows": len(product_ids),
+        "base_ts": base_ts,
+        "min_ts": base_ts,
+        "max_ts": int(timestamps.max()) if len(timestamps) else 0,
+        "currencies": table.tolist(),
+        "replaces": sorted(replaces),
+        "columns": layout,
+    }
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_start = _aligned(_FILE_HEADER.size + len(header_bytes))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as segment_file:
+        segment_file.write(_FILE_HEADER.pack(_MAGIC, len(header_bytes)))
+        segment_file.write(header_bytes)
+        for name, _ in _COLUMNS:
+            segment_file.seek(data_start + layout[name][0])
+            segment_file.write(columns[name].tobytes())
+    os.replace(tmp_path, path)
+
+
+class Segment:
+    """One immutable segment file, memory-mapped column by column."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(path, 'rb') as segment_file:
+            magic, header_length = _FILE_HEADER.unpack(segment_file.read(_FILE_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a price history segment")
+            header = json.loads(segment_file.read(header_length))
+        data_start = _aligned(_FILE_HEADER.size + header_length)
+        self.rows = header["rows"]
+        self.base_ts = header["base_ts"]
+        self.min_ts = header["min_ts"]
+        self.max_ts = header["max_ts"]
+        self.currencies = header["currencies"]
+        self.replaces = header["replaces"]
+        self.size = os.path.getsize(path)
+        for name, dtype in _COLUMNS:
+            offset, length = header["columns"][name]
+            if length:
+                column = np.memmap(path, dtype=dtype, mode='r', offset=data_start + offset, shape=(length,))
+            else:
+                column = np.empty(0, dtype=dtype)
+            setattr(self, name, column)
+
+    def history(self, product_id: int, since: int, until: int) -> List[Tuple[int, float, str]]:
+        """(timestamp, price, currency) for one product within [since, until]."""
+        i = int(np.searchsorted(self.product_ids, product_id))
+        if i == len(self.product_ids) or self.product_ids[i] != product_id:
+            return []
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        timestamps = self.base_ts + np.cumsum(self.ts_deltas[start:end], dtype=np.int64)
+        mask = (timestamps >= since) & (timestamps <= until)
+        return list(zip(
+            timestamps[mask].tolist(),
+            np.asarray(self.prices[start:end])[mask].tolist(),
+            [self.currencies[code] for code in self.currency_codes[start:end][mask]],
+        ))
+
+    def columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Every row decoded: product ids, timestamps, prices and currencies."""
+        counts = np.diff(self.offsets)
+        product_ids = np.repeat(np.asarray(self.product_ids), counts)
+        running = np.cumsum(self.ts_deltas, dtype=np.int64)
+        # Each run's deltas restart from base_ts
+        run_base = running[self.offsets[:-1]] - self.ts_deltas[self.offsets[:-1]]
+        timestamps = self.base_ts + running - np.repeat(run_base, counts)
+        currencies = np.array(self.currencies)[self.currency_codes]
+        return product_ids, timestamps, np.array(self.prices), currencies
+
+
+class PriceHistoryStore:
+    """Append-only price observations per catalog product.
+
+    ``record`` buffers observations in memory; a background task writes the
+    buffer out as a new segment every ``flush_interval`` seconds or once
+    ``flush_rows`` are waiting. Segments are never modified; they are
+    compacted in size tiers instead (a tier spans a factor of
+    ``max_segments`` in rows). Once a tier holds more than ``max_segments``
+    segments they are merged into one new segment, which lands in a higher
+    tier, and deleted, so each observation is rewritten about once per tier.
+    Segments of ``segment_rows`` or more are left as they are. A range query
+    reads one product's run from each overlapping segment without touching
+    the database.
+    """
+
+    def __init__(
+        self,
+        directory: str = PRICE_HISTORY_DIR,
+        flush_interval: float = PRICE_HISTORY_FLUSH_INTERVAL,
+        flush_rows: int = PRICE_HISTORY_FLUSH_ROWS,
+        max_segments: int = PRICE_HISTORY_MAX_SEGMENTS,
+        segment_rows: int = PRICE_HISTORY_SEGMENT_ROWS,
+    ):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.max_segments = max_segments
+        self.segment_rows = segment_rows
+        # Guards the buffer and the segment list; _write_lock serializes
+        # flushes and compactions
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buffer: List[Observation] = []
+        # Taken from the buffer and not yet visible as a segment
+        self._flushing: List[Observation] = []
+        # Created in start(), on the loop that runs the flush task
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.flushes = 0
+        self.compactions = 0
+        self.compacted_rows = 0
+        self.flush_latency = LatencyStats()
+        self.compaction_latency = LatencyStats()
+        os.makedirs(directory, exist_ok=True)
+        self.segments = self._load_segments()
+
+    def _load_segments(self) -> List[Segment]:
+        segments = {}
+        for name in os.listdir(self.directory):
+            if not _SEGMENT_NAME.match(name):
+                continue
+            try:
+                segments[name] = Segment(os.path.join(self.directory, name))
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Skipping unreadable price history segment {name}: {e}")
+        # A compaction that crashed before deleting its inputs leaves them behind
+        replaced = {name for segment in segments.values() for name in segment.replaces}
+        for name in replaced & segments.keys():
+            logger.info(f"Removing price history segment {name}, already compacted")
+            os.remove(segments.pop(name).path)
+        self._next_seq = 1 + max((int(_SEGMENT_NAME.match(name).group(1)) for name in segments), default=0)
+        logger.info(f"Loaded {len(segments)} price history segments from {self.directory}")
+        return sorted(segments.values(), key=lambda segment: segment.name)
+
+    def _segment_path(self) -> str:
+        name = f"segment-{self._next_seq:08d}.phs"
+        self._next_seq += 1
+        return os.path.join(self.directory, name)
+
+    def record(self, rows: Iterable[Dict], observed_at: Optional[float] = None) -> int:
+        """Buffer the price of each catalog row (``id``, ``price``, ``currency``)."""
+        timestamp = int(observed_at if observed_at is not None else time.time())
+        observations = {}
+        for row in rows:
+            price = row.get("price")
+            if row.get("id") is None or price is None or not math.isfinite(price):
+                continue
+            observations[int(row["id"])] = (int(row["id"]), timestamp, float(price), row.get("currency") or "")
+        with self._lock:
+            self._buffer.extend(observations.values())
+            buffered = len(self._buffer)
+        self.recorded += len(observations)
+        if buffered >= self.flush_rows and self._wakeup is not None:
+            self._wakeup.set()
+        return len(observations)
+
+    def flush(self):
+        """Write the buffered observations out as a new segment (blocking)."""
+        with self._write_lock:
+            with self._lock:
+                self._flushing, self._buffer = self._buffer, []
+                rows = self._flushing
+            if not rows:
+                return
+            start = time.perf_counter()
+            try:
+                product_ids, timestamps, prices, currencies = zip(*rows)
+                path = self._segment_path()
+                write_segment(
+                    path,
+                    np.array(product_ids, dtype=np.int64),
+                    np.array(timestamps, dtype=np.int64),
+                    np.array(prices, dtype=np.float64),
+                    np.array(currencies),
+                )
+                segment = Segment(path)
+            except Exception:
+                # Back into the buffer for the next attempt
+                with self._lock:
+                    self._buffer[:0] = rows
+                    self._flushing = []
+                raise
+            with self._lock:
+                self.segments.append(segment)
+                self._flushing = []
+            self.flushes += 1
+            self.flush_latency.record((time.perf_counter() - start) * 1000)
+            self._compact()
+
+    def _tier(self, segment: Segment) -> int:
+        return int(math.log(max(segment.rows, 1), max(self.max_segments, 2)))
+
+    def _compact(self):
+        """Merge the smallest tier holding more than ``max_segments`` segments, repeatedly."""
+        while True:
+            tiers: Dict[int, List[Segment]] = {}
+            for segment in self.segments:
+                if segment.rows < self.segment_rows:
+                    tiers.setdefault(self._tier(segment), []).append(segment)
+            full = [tier for tier, segments in tiers.items() if len(segments) > self.max_segments]
+            if not full:
+                return
+            self._merge(tiers[min(full)])
+
+    def _merge(self, small: List[Segment]):
+        start = time.perf_counter()
+        decoded = [segment.columns() for segment in small]
+        path = self._segment_path()
+        write_segment(
+            path,
+            np.concatenate([columns[0] for columns in decoded]),
+            np.concatenate([columns[1] for columns in decoded]),
+            np.concatenate([columns[2] for columns in decoded]),
+            np.concatenate([columns[3] for columns in decoded]),
+            replaces=[segment.name for segment in small],
+        )
+        merged = Segment(path)
+        with self._lock:
+            self.segments = [segment for segment in self.segments if segment not in small] + [merged]
+        # Readers holding the old memmaps keep them valid until they finish
+        for segment in small:
+            os.remove(segment.path)
+        self.compactions += 1
+        self.compacted_rows += merged.rows
+        self.compaction_latency.record((time.perf_counter() - start) * 1000)
+        logger.info(f"Compacted {len(small)} price history segments into {merged.name} ({merged.rows} rows)")
+
+    def history(self, product_id: int, since: float, until: float) -> List[Tuple[int, float, str]]:
+        """(timestamp, price, currency) observations of one product, oldest first."""
+        since, until = int(since), int(until)
+        with self._lock:
+            segments = list(self.segments)
+            pending = self._flushing + self._buffer
+        points = []
+        for segment in segments:
+            if segment.max_ts >= since and segment.min_ts <= until:
+                points.extend(segment.history(product_id, since, until))
+        points.extend(
+            (timestamp, price, currency)
+            for observed_id, timestamp, price, currency in pending
+            if observed_id == product_id and since <= timestamp <= until
+        )
+        points.sort(key=lambda point: point[0])
+        return points
+
+    async def get_history(self, product_id: int, since: float, until: float) -> List[Tuple[int, float, str]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.history, product_id, since, until)
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background task and write out whatever is buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.flush)
+            except Exception as e:
+                logger.error(f"Error writing price history segment: {e}")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            segments = list(self.segments)
+            buffered = len(self._buffer) + len(self._flushing)
+        return {
+            "segments": len(segments),
+            "rows_on_disk": sum(segment.rows for segment in segments),
+            "bytes_on_disk": sum(segment.size for segment in segments),
+            "buffered": buffered,
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "compactions": self.compactions,
+            # Rows rewritten by compaction, against "recorded" for write amplification
+            "compacted_rows": self.compacted_rows,
+            "flush": self.flush_latency.snapshot(),
+            "compaction": self.compaction_latency.snapshot(),
+        }
+
+
+_price_history: Optional[PriceHistoryStore] = None
+
+
+def get_price_history() -> Optional[PriceHistoryStore]:
+    """Return the process-wide price history store, or None if disabled."""
+    global _price_history
+    if _price_history is None and PRICE_HISTORY_DIR:
+        _price_history = PriceHistoryStore()
+    return _price_history
+
+
+async def close_price_history():
+    """Stop the process-wide store (called on app shutdown); the next lifespan opens a new one."""
+    global _price_history
+    if _price_history is not None:
+        await _price_history.stop()
+        _price_history = None
@@ -1,61 +1,348 @@
-from typing import List, Dict
-import pandas as pd
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from datetime import datetime
+import asyncio
 import logging
-from ..models.product import ProductCreate
+import time
+from ..models.product_batch import ProductBatch
+from ..models.product_record import ProductRecord
 from ..database import save_product_results, get_products_by_query
+from .cache import TieredCache, get_search_cache
+from .negative_cache import NegativeCache, get_negative_cache
 from .scraper_service import ScraperService
+from .single_flight import SingleFlight
+from .write_behind import WriteBehindQueue
+from ..utils.helpers import parse_timestamp
+from ..utils.query_canonicalizer import QueryCanonicalizer, get_query_canonicalizer
 
 logger = logging.getLogger(__name__)
 
+# Shared across requests so identical concurrent searches run one scrape
+search_flight = SingleFlight()
+
 class ProductService:
-    def __init__(self):
-        self.scraper = ScraperService()
+    def __init__(
+        self,
+        scraper: Optional[ScraperService] = None,
+        cache: Optional[TieredCache] = None,
+        queries: Optional[QueryCanonicalizer] = None,
+        negative: Optional[NegativeCache] = None,
+        writer: Optional[WriteBehindQueue] = None,
+        failures: Optional[NegativeCache] = None,
+    ):
+        self.scraper = scraper or ScraperService()
+        self.cache = cache if cache is not None else get_search_cache()
+        self.queries = queries or get_query_canonicalizer()
+        self.negative = negative if negative is not None else get_negative_cache()
+        # Takes (key, products) and saves them after the response; without
+        # one, results are saved before returning
+        self.writer = writer
+        # (query key, retailer) pairs whose last scrape failed; skipped
+        # until it expires instead of re-scraped on every request
+        self.failures = failures
+        # Background refreshes of stale cache entries, one per cache key
+        self._revalidations: Dict[str, asyncio.Task] = {}
+        self.revalidated = 0
+        self.revalidation_failures = 0
     
-    async def search_and_save_products(self, query: str) -> List[Dict[str, any]]:
+    async def search_and_save_products(self, query: str) -> List[ProductRecord]:
         """Search for products and save results to database"""
-        logger.info(f"Searching for products with query: {query}")
+        products, _ = await self.search_with_status(query)
+        return products
+    
+    async def search_with_status(
+        self, query: str, deadline_ms: Optional[int] = None
+    ) -> Tuple[List[ProductRecord], Dict[str, str]]:
+        """Search (or load cached results) and return products plus a status per source.
+
+        Queries are keyed by their canonical form, so concurrent calls for
+        equivalent queries and the same deadline share one scrape and one
+        database write.
+        """
+        key = self.queries.key(query)
+        return await search_flight.do(
+            (key, deadline_ms),
+            lambda: self._search_and_save(query, key, deadline_ms),
+        )
+    
+    async def _search_and_save(
+        self, query: str, key: str, deadline_ms: Optional[int] = None
+    ) -> Tuple[List[ProductRecord], Dict[str, str]]:
+        logger.info(f"Searching for products with query: {query} (key: {key})")
         
-        # Check if we have recent results for this query
-        cached_results = await get_products_by_query(query)
-        if cached_results:
-            logger.info(f"Found cached results for query: {query}")
-            return cached_results
+        # Cached retailers first; only the ones without a cached shard are scraped
+        results, statuses, missing = await self._load_cached(query, key)
+        missing = self._skip_failed(key, missing, statuses)
+        fetched = {}
+        if missing:
+            async for source, status, products in self.scraper.iter_search(query, deadline_ms, missing):
+                statuses[source] = status
+                if status == "ok":
+                    fetched[source] = products
+                else:
+                    self._remember_failed(key, source, status)
+            results.update(fetched)
         
-        # If no cached results, perform scraping
-        products = await self.scraper.search_products(query)
+        products = await self._merge(results)
         logger.info(f"Found {len(products)} products for query: {query}")
+        if missing:
+            if products:
+                await self._cache_shards(key, fetched)
+            await self._save_scraped(query, key, products, fetched, statuses)
+        return products, statuses
+    
+    def _shard_key(self, key: str, source: str) -> str:
+        return f"search:{key}:{source}"
+    
+    async def _load_cached(
+        self, query: str, key: str
+    ) -> Tuple[Dict[str, List[ProductRecord]], Dict[str, str], List[str]]:
+        """Cached products per retailer, their statuses and the retailers still to scrape.
         
+        Each retailer's results are cached separately (a shard) with that
+        retailer's cache_ttl. Stale shards are served and refreshed in the
+        background. Only when no retailer has a shard are the negative cache
+        and then the database consulted.
+        """
+        sources = [source for source, _ in self.scraper.search_sources()]
+        shards = {}
+        if self.cache is not None:
+            entries = await asyncio.gather(*(self.cache.get(self._shard_key(key, source)) for source in sources))
+            shards = {source: entry for source, entry in zip(sources, entries) if entry is not None}
+        
+        if shards:
+            logger.info(f"Found cached results from {len(shards)} of {len(sources)} retailers for query: {query}")
+            results = {
+                source: [ProductRecord.from_dict(row) for row in entry.value["products"]]
+                for source, entry in shards.items()
+            }
+            stale = [source for source, entry in shards.items() if entry.stale]
+            if stale:
+                # Serve them now; the next request gets the refreshed copies
+                self._revalidate(query, key, stale, results)
+            return results, {source: "cached" for source in shards}, [s for s in sources if s not in shards]
         
-        if isinstance(products, pd.DataFrame):
-            logger.info("Converting DataFrame to list of dictionaries.")
-            products = products.to_dict(orient="records")
-        # Save results to database
-        if products:
+        if self.negative is not None and self.negative.contains(key):
+            logger.info(f"Skipping scrape for recently empty query: {query}")
+            return {}, {source: "cached" for source in sources}, []
+        
+        cached_results = await get_products_by_query(key)
+        if not cached_results:
+            return {}, {}, sources
+        logger.info(f"Found database results for query: {query}")
+        results = {}
+        for row in cached_results:
+            results.setdefault(row["source"], []).append(ProductRecord.from_dict(row))
+        # Shards dated by the saved search, so old rows are cached already
+        # stale and refreshed in the background like any stale shard
+        stale = await self._cache_shards(key, results, parse_timestamp(cached_results[0]["searched_at"]))
+        if stale:
+            self._revalidate(query, key, stale, results)
+        # Retailers the saved search has no rows for are scraped again
+        return results, {source: "cached" for source in results}, [s for s in sources if s not in results]
+    
+    async def _cache_shards(
+        self, key: str, results: Dict[str, List[ProductRecord]], stored_at: Optional[float] = None
+    ) -> List[str]:
+        """Cache each retailer's products (as parsed) under its own TTL.
+
+        Only called when the query has products somewhere: for a query empty
+        everywhere any shard, even an empty one, would keep ``_load_cached``
+        from reaching the negative cache. ``stored_at`` dates products
+        scraped earlier; returns the retailers whose shards are already stale.
+        """
+        if self.cache is None:
+            return []
+        stale = []
+        for source, products in results.items():
+            adapter = self.scraper.registry.get(source)
+            ttl = adapter.cache_ttl if adapter and adapter.cache_ttl is not None else self.cache.ttl
+            await self.cache.set(
+                self._shard_key(key, source),
+                {"products": [product.to_dict() for product in products]},
+                ttl=ttl,
+                stored_at=stored_at,
+            )
+            if stored_at is not None and stored_at + ttl <= time.time():
+                stale.append(source)
+        return stale
+    
+    async def _merge(self, results: Dict[str, List[ProductRecord]]) -> List[ProductRecord]:
+        """All retailers' products converted with the current rates and sorted by USD price."""
+        await self.scraper.fx.ensure_rates()
+        records = [product for products in results.values() for product in products]
+        return ProductBatch.from_records(records).convert(self.scraper.fx.rates).sort_by_usd().to_products()
+    
+    async def _save_scraped(
+        self,
+        query: str,
+        key: str,
+        products: List[ProductRecord],
+        fetched: Dict[str, List[ProductRecord]],
+        statuses: Dict[str, str],
+    ):
+        if not products:
+            self._remember_empty(key, statuses)
+        # Saved only when the scrape added products: re-scraping a retailer
+        # that came back empty would otherwise store the cached ones again.
+        # Partial results would be served later as complete.
+        elif any(fetched.values()) and "timed_out" not in statuses.values():
+            await self._persist(query, products)
+    
+    async def _persist(self, query: str, products: List[ProductRecord]):
+        # Stored as typed, for display; the repository adds the canonical key for lookups
+        if self.writer is not None:
+            self.writer.submit((query, products))
+        else:
             await save_product_results(query, products)
             logger.info(f"Saved {len(products)} products to database")
+    
+    def _skip_failed(self, key: str, sources: List[str], statuses: Dict[str, str]) -> List[str]:
+        """The retailers to scrape; ones that failed for this query moments ago are reported failed."""
+        if self.failures is None:
+            return sources
+        to_scrape = []
+        for source in sources:
+            if self.failures.contains(self._shard_key(key, source)):
+                statuses[source] = "failed"
+            else:
+                to_scrape.append(source)
+        return to_scrape
+    
+    def _remember_failed(self, key: str, source: str, status: str):
+        # A timeout depends on the caller's deadline, not on the retailer
+        if self.failures is not None and status == "failed":
+            self.failures.add(self._shard_key(key, source))
+    
+    def _remember_empty(self, key: str, statuses: Dict[str, str]):
+        # Only a clean miss everywhere; a failed or timed out retailer may have results
+        if self.negative is not None and statuses and all(
+            status in ("ok", "cached") for status in statuses.values()
+        ):
+            self.negative.add(key)
+    
+    def _revalidate(self, query: str, key: str, sources: List[str], results: Dict[str, List[ProductRecord]]):
+        """Re-scrape the retailers whose shards are stale, without blocking the caller.
         
-        return products
+        ``results`` is the caller's per-retailer dict; retailers it scrapes in
+        the meantime are included when the refreshed result is saved.
+        """
+        if key in self._revalidations:
+            return
+        task = asyncio.create_task(self._refresh(query, key, sources, results))
+        self._revalidations[key] = task
+        task.add_done_callback(lambda _: self._revalidations.pop(key, None))
+    
+    async def _refresh(self, query: str, key: str, sources: List[str], results: Dict[str, List[ProductRecord]]):
+        logger.info(f"Refreshing stale results from {', '.join(sources)} for query: {query}")
+        try:
+            fetched = {}
+            async for source, status, products in self.scraper.iter_search(query, sources=sources):
+                if status == "ok" and products:
+                    fetched[source] = products
+                else:
+                    # The stale shard stays in place until its hard TTL;
+                    # an empty page does not replace good results either
+                    logger.warning(
+                        f"Keeping last good {source} results for query {query}: "
+                        f"refresh {status if status != 'ok' else 'empty'}"
+                    )
+            if not fetched:
+                raise ValueError("no retailer could be refreshed")
+            await self._cache_shards(key, fetched)
+            products = await self._merge({**results, **fetched})
+            if products:
+                await self._persist(query, products)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.revalidation_failures += 1
+            logger.error(f"Error refreshing results for query {query}: {e}")
+            return
+        self.revalidated += 1
+        logger.info(f"Refreshed {', '.join(fetched)} for query: {query}")
+    
+    async def stop(self):
+        """Cancel background refreshes still running at shutdown."""
+        tasks = list(self._revalidations.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def revalidation_snapshot(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._revalidations),
+            "completed": self.revalidated,
+            "failed": self.revalidation_failures,
+        }
+    
+    async def stream_search(self, query: str, deadline_ms: Optional[int] = None) -> AsyncIterator[Dict]:
+        """Yield one message per retailer as it completes, then the merged result.
+
+        Each ``source`` message carries that retailer's status and formatted
+        products (cached retailers come first); the final ``done`` message
+        carries every product sorted by USD price and the status of every source.
+        """
+        key = self.queries.key(query)
+        results, statuses, missing = await self._load_cached(query, key)
+        missing = self._skip_failed(key, missing, statuses)
+        await self.scraper.fx.ensure_rates()
+        for source, products in list(results.items()):
+            yield await self._source_message(source, statuses[source], products)
+        for source, status in list(statuses.items()):
+            if source not in results:
+                # Skipped after a recent failure
+                yield await self._source_message(source, status, [])
+        
+        fetched = {}
+        async for source, status, products in self.scraper.iter_search(query, deadline_ms, missing):
+            statuses[source] = status
+            if status == "ok":
+                fetched[source] = products
+            else:
+                self._remember_failed(key, source, status)
+            yield await self._source_message(source, status, products)
+        results.update(fetched)
+        
+        all_results = await self._merge(results)
+        if missing:
+            if all_results:
+                await self._cache_shards(key, fetched)
+            await self._save_scraped(query, key, all_results, fetched, statuses)
+
+        yield {
+            "event": "done",
+            "query": query,
+            "timestamp": datetime.now().isoformat(),
+            "sources": statuses,
+            "products": await self.format_products_for_response(all_results),
+        }
+    
+    async def _source_message(self, source: str, status: str, products: List[ProductRecord]) -> Dict:
+        return {
+            "event": "source",
+            "source": source,
+            "status": status,
+            "products": await self.format_products_for_response(
+                self.scraper.normalize_prices(products)
+            ),
+        }
     
-    async def format_products_for_response(self, products: List[Dict]) -> List[Dict]:
+    async def format_products_for_response(self, products: List[ProductRecord]) -> List[Dict]:
         """Format product data for API response"""
-        # Fix: Ensure products is a list, not a DataFrame
-        if isinstance(products, pd.DataFrame):
-            logger.info("Converting DataFrame to list of dictionaries.")
-            products = products.to_dict(orient="records")
         formatted_products = []
         
         for product in products:
             formatted_product = {
-                "title": product["title"],
-                "price": product["price"],
-                "currency": product["currency"],
-                "display_price": f"{product['price']:.2f} {product['currency']}",
-                "price_usd": f"{product['price_usd']:.2f} USD" if product.get("price_usd") else None,
-                "price_kes": f"{product['price_kes']:.2f} KES" if product.get("price_kes") else None,
-                "description": product.get("description", ""),
-                "source": product["source"],
-                "url": product["url"],
-                "logo_url": self._get_source_logo(product["source"])
+                "title": product.title,
+                "price": product.price,
+                "currency": product.currency,
+                "display_price": f"{product.price:.2f} {product.currency}",
+                "price_usd": f"{product.price_usd:.2f} USD" if product.price_usd else None,
+                "price_kes": f"{product.price_kes:.2f} KES" if product.price_kes else None,
+                "description": product.description,
+                "source": product.source,
+                "url": product.url,
+                "logo_url": self._get_source_logo(product.source)
             }
             formatted_products.append(formatted_product)
         
@@ -63,10 +350,5 @@ class ProductService:
     
     def _get_source_logo(self, source: str) -> str:
         """Get logo URL for a source"""
-        logos = {
-            "Amazon": "/images/amazon-logo.png",
-            "eBay": "/images/ebay-logo.png",
-            "Jumia": "/images/jumia-logo.png",
-            "Kilimall": "/images/kilimall-logo.png"
-        }
-        return logos.get(source, "/images/default-logo.png")
\ No newline at end of file
+        adapter = self.scraper.registry.get(source)
+        return (adapter.logo if adapter else None) or "/images/default-logo.png"
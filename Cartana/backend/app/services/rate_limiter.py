@@ -0,0 +1,119 @@
+import asyncio
+import time
+import logging
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from ..config import DEFAULT_RATE_LIMIT
+from ..utils.metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket for one retailer host.
+
+    Requests go out immediately while tokens are available. When the bucket
+    is empty, callers wait on an asyncio.Lock, whose waiters are served in
+    FIFO order, so queued requests are released fairly as tokens refill.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self.wait_stats = LatencyStats()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                self._refill()
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    self._refill()
+                self.tokens -= 1
+        finally:
+            self.waiting -= 1
+        self.wait_stats.record((time.perf_counter() - start) * 1000)
+
+    def level(self) -> float:
+        self._refill()
+        return self.tokens
+
+
+class RateLimiter:
+    """Per-host token buckets for outbound retailer requests."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        default: Tuple[float, int] = DEFAULT_RATE_LIMIT,
+    ):
+        self.default = default
+        self.buckets: Dict[str, TokenBucket] = {}
+        # Per-retailer limits are normally applied by the retailer registry
+        for host, (rate, burst) in (limits or {}).items():
+            self.configure(host, rate, burst)
+
+    @staticmethod
+    def _host_key(url_or_host: str) -> str:
+        host = urlparse(url_or_host).hostname if "://" in url_or_host else url_or_host
+        host = (host or "").lower()
+        return host[4:] if host.startswith("www.") else host
+
+    def configure(self, host: str, rate: float, burst: int):
+        """Set the rate and burst for a host, keeping its current token level."""
+        key = self._host_key(host)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.buckets[key] = TokenBucket(rate, burst)
+        else:
+            bucket.rate = rate
+            bucket.burst = burst
+            bucket.tokens = min(bucket.tokens, burst)
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        key = self._host_key(url)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            # Unknown hosts get their own bucket at the default rate
+            bucket = self.buckets[key] = TokenBucket(*self.default)
+        return bucket
+
+    async def acquire(self, url: str):
+        await self.bucket_for(url).acquire()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current bucket level, queue length and wait times per host."""
+        return {
+            host: {
+                "rate": bucket.rate,
+                "burst": bucket.burst,
+                "tokens": round(bucket.level(), 3),
+                "waiting": bucket.waiting,
+                "wait": bucket.wait_stats.snapshot(),
+            }
+            for host, bucket in self.buckets.items()
+        }
+
+
+_shared_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it on first use."""
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = RateLimiter()
+    return _shared_limiter
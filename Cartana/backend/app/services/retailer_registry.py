@@ -0,0 +1,122 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+from urllib.parse import quote_plus, urlparse
+
+import yaml
+
+from ..config import RETAILERS_CONFIG, RETAILERS_RELOAD_INTERVAL
+from .extraction import build_extractor
+from .rate_limiter import RateLimiter, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class RetailerAdapter:
+    """One retailer as declared in retailers.yaml."""
+
+    def __init__(self, spec: Dict):
+        self.name = spec['name']
+        self.base_url = spec['base_url']
+        self.search_url = spec['search_url']
+        self.currency = spec.get('currency', 'USD')
+        self.logo = spec.get('logo')
+        rate_limit = spec.get('rate_limit') or {}
+        self.rate = rate_limit.get('rate')
+        self.burst = rate_limit.get('burst')
+        self.host = urlparse(self.base_url).hostname
+        # Parse while downloading and stop once max_products have been read
+        self.stream = bool(spec.get('stream', False))
+        self.max_products = spec.get('max_products')
+        # Seconds this retailer's cached results stay fresh; None uses CACHE_TTL
+        self.cache_ttl = spec.get('cache_ttl')
+
+        # Plain, picklable copy of the entry handed to parser workers; the
+        # fingerprint tells a worker when its compiled copy is out of date
+        self.spec = copy.deepcopy(spec)
+        self.spec['fingerprint'] = hashlib.sha1(
+            json.dumps(spec, sort_keys=True).encode()
+        ).hexdigest()
+
+        # Compile here as well so a bad selector is rejected at load time
+        self.extractor = build_extractor(self.spec)
+
+    def url_for(self, query: str) -> str:
+        return self.search_url.format(query=quote_plus(query))
+
+
+class RetailerRegistry:
+    """Retailer adapters loaded from YAML and reloaded when the file changes."""
+
+    def __init__(self, path: str = RETAILERS_CONFIG, rate_limiter: Optional[RateLimiter] = None):
+        self.path = path
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.adapters: Dict[str, RetailerAdapter] = {}
+        self.version = 0
+        self._mtime: Optional[float] = None
+        self.load()
+
+    def load(self) -> bool:
+        """(Re)load the config. On error the previous adapters stay active."""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding='utf-8') as config_file:
+                config = yaml.safe_load(config_file) or {}
+            adapters = {}
+            for spec in config.get('retailers', []):
+                if spec.get('enabled', True):
+                    adapter = RetailerAdapter(spec)
+                    adapters[adapter.name] = adapter
+        except Exception as e:
+            if not self.adapters:
+                raise
+            logger.error(f"Could not reload retailer config {self.path}, keeping previous adapters: {e}")
+            self._mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else self._mtime
+            return False
+
+        for adapter in adapters.values():
+            if adapter.rate and adapter.burst:
+                self.rate_limiter.configure(adapter.host, adapter.rate, adapter.burst)
+
+        self.adapters = adapters
+        self._mtime = mtime
+        self.version += 1
+        logger.info(f"Loaded {len(adapters)} retailer adapters from {self.path} (version {self.version})")
+        return True
+
+    def reload_if_changed(self) -> bool:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            logger.error(f"Retailer config {self.path} is not readable: {e}")
+            return False
+        if mtime == self._mtime:
+            return False
+        return self.load()
+
+    async def watch(self, interval: float = RETAILERS_RELOAD_INTERVAL):
+        """Poll the config file and hot-reload adapters when it changes."""
+        while True:
+            await asyncio.sleep(interval)
+            self.reload_if_changed()
+
+    def get(self, name: str) -> Optional[RetailerAdapter]:
+        return self.adapters.get(name)
+
+    def all(self) -> List[RetailerAdapter]:
+        return list(self.adapters.values())
+
+
+_shared_registry: Optional[RetailerRegistry] = None
+
+
+def get_registry() -> RetailerRegistry:
+    """Return the process-wide retailer registry, loading it on first use."""
+    global _shared_registry
+    if _shared_registry is None:
+        _shared_registry = RetailerRegistry()
+    return _shared_registry
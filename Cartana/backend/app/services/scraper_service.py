@@ -1,458 +1,212 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import quote_plus, urljoin
-import time
-import pandas as pd
-import re
-import random
-from typing import List, Dict, Optional, Tuple
+import asyncio
+import functools
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+import pandas as pd
+from typing import AsyncIterator, Awaitable, Callable, Collection, List, Dict, Optional, Tuple
 
 import logging
-# from config import CURRENCY_API_URL
+from .fx_service import FxService, get_fx_service
+from .http_client import HttpClient, get_http_client
+from .parser_pool import ParserPool, get_parser_pool
+from .retailer_registry import RetailerAdapter, RetailerRegistry, get_registry
+from ..models.product_batch import ProductBatch
+from ..models.product_record import ProductRecord
+from ..utils.helpers import clean_price
 
 logger = logging.getLogger(__name__)
 
+# Streamed pages are handed to the incremental parser in batches of about
+# this many bytes, each parsed off the event loop
+STREAM_PARSE_BATCH = 64 * 1024
+
 class ScraperService:
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'DNT': '1',
-        }
-        self.amazon_base_url = "https://www.amazon.com"
-        self.ebay_base_url = "https://www.ebay.com"
-        self.jumia_base_url = "https://www.jumia.co.ke"
-        self.kilimall_base_url = "https://www.kilimall.co.ke"
-        
-        # Get current USD to KES exchange rate
-        self.usd_to_kes = self.get_exchange_rate()
-        logger.info(f"Current USD to KES exchange rate: {self.usd_to_kes}")
-        
-    def get_exchange_rate(self) -> float:
-        """Get current USD to KES exchange rate."""
-        try:
-            # Using a free currency API
-            response = requests.get("https://open.er-api.com/v6/latest/USD", timeout=10)
-            data = response.json()
-            return data["rates"]["KES"]
-        except Exception as e:
-            logger.error(f"Error fetching exchange rate: {e}")
-            # Fallback to an approximate exchange rate if the API fails
-            return 130.0  # Example fallback rate
+    def __init__(
+        self,
+        http_client: Optional[HttpClient] = None,
+        parser_pool: Optional[ParserPool] = None,
+        registry: Optional[RetailerRegistry] = None,
+        fx: Optional[FxService] = None,
+    ):
+        # Shared pooled client; browser headers are set on the client itself
+        self.http = http_client or get_http_client()
+        self.parser_pool = parser_pool or get_parser_pool()
+        # Retailer URLs, selectors and rate limits come from retailers.yaml
+        self.registry = registry or get_registry()
+        # App-wide exchange rate table, refreshed in the background
+        self.fx = fx or get_fx_service()
     
-    def make_request(self, url: str) -> Optional[str]:
-        """Make HTTP request with proper error handling and logging."""
-        try:
-            # Add jitter to avoid rate limiting
-            time.sleep(random.uniform(1, 3))
-            
-            response = requests.get(url, headers=self.headers, timeout=10)
-            logger.debug(f"Request to {url}: Status code {response.status_code}")
-            
-            if response.status_code == 200:
-                return response.text
-            else:
-                logger.warning(f"Request failed with status code: {response.status_code} for {url}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error for {url}: {e}")
-            return None
+    def request_headers(self) -> Optional[Dict[str, str]]:
+        """Headers added to each retailer request, fetched or streamed."""
+        return None
+
+    async def make_request(self, url: str) -> Optional[bytes]:
+        """Fetch a page's raw bytes over the shared async client."""
+        # Pacing is handled by the client's per-host token buckets
+        return await self.http.fetch(url, headers=self.request_headers())
 
     def clean_price(self, price_str: str, currency: str = 'USD') -> Tuple[Optional[float], str]:
         """Extract and clean price from string, returning float value and currency."""
-        if not price_str:
-            return None, currency
-    
-        # Determine currency from string
-        if 'KSh' in price_str or 'Ksh' in price_str or 'KES' in price_str:
-            currency = 'KES'
-        elif '£' in price_str or 'GBP' in price_str:
-            currency = 'GBP'
-        elif '€' in price_str or 'EUR' in price_str:
-            currency = 'EUR'
-    
-        # Remove all non-numeric characters except periods and commas
-        digits_only = re.sub(r'[^\d.,]', '', price_str)
-    
+        return clean_price(price_str, currency)
+
+    def search_sources(
+        self, sources: Optional[Collection[str]] = None
+    ) -> List[Tuple[str, Callable[[str], Awaitable[List[ProductRecord]]]]]:
+        """Retailer name and search coroutine for every registered source, or only ``sources``."""
+        return [
+            (adapter.name, functools.partial(self.search_retailer, adapter))
+            for adapter in self.registry.all()
+            if sources is None or adapter.name in sources
+        ]
+
+    def normalize_prices(self, products: List[ProductRecord]) -> List[ProductRecord]:
+        """Return the products with USD and KES values filled in."""
+        return ProductBatch.from_records(products).convert(self.fx.rates).to_products()
+
+    async def iter_search(
+        self,
+        query: str,
+        deadline_ms: Optional[int] = None,
+        sources: Optional[Collection[str]] = None,
+    ) -> AsyncIterator[Tuple[str, str, List[ProductRecord]]]:
+        """Yield (source, status, products) as each retailer (or each of ``sources``) finishes.
+
+        Products are the records as parsed; converting and sorting is left to
+        the caller (see search_batch and normalize_prices).
+
+        Status is "ok" or "failed". When ``deadline_ms`` runs out, every fetch
+        still in flight is cancelled and reported as "timed_out".
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + deadline_ms / 1000 if deadline_ms else None
+        # All retailer requests share one event loop and connection pool
+        tasks = {
+            asyncio.ensure_future(search(query)): source
+            for source, search in self.search_sources(sources)
+        }
+        pending = set(tasks)
         try:
-            # Handle scientific notation
-            if 'e' in digits_only.lower():
-                return float(digits_only), currency
-                
-            # Determine decimal separator
-            last_comma_pos = digits_only.rfind(',')
-            last_period_pos = digits_only.rfind('.')
-            
-            if last_comma_pos > 0 and last_period_pos > 0:
-                if last_comma_pos > last_period_pos:
-                    # European format (comma is decimal separator)
-                    cleaned = digits_only.replace('.', '').replace(',', '.')
-                else:
-                    # US format (period is decimal separator)
-                    cleaned = digits_only.replace(',', '')
-            elif last_comma_pos > 0:
-                if len(digits_only) - last_comma_pos <= 3:
-                    # Likely a decimal comma
-                    cleaned = digits_only.replace(',', '.')
-                else:
-                    # Likely a thousands separator
-                    cleaned = digits_only.replace(',', '')
-            else:
-                # Only periods or no separators
-                cleaned = digits_only
-            
-            result = float(cleaned)
-            
-            # Heuristic for unreasonably large prices
-            if result > 10000 and '.' in cleaned:
-                parts = cleaned.split('.')
-                if len(parts) == 2 and len(parts[0]) > 2:
-                    candidates = []
-                    if len(parts[0]) > 2:
-                        test_price = float(parts[0][:-2] + '.' + parts[0][-2:] + parts[1])
-                        candidates.append((test_price, abs(test_price - 100)))
-                    
-                    if candidates:
-                        candidates.sort(key=lambda x: x[1])
-                        alternate_result = candidates[0][0]
-                        if alternate_result < result / 10:
-                            logger.info(f"Price correction: {result} -> {alternate_result}")
-                            result = alternate_result
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    source = tasks[task]
+                    if task.exception() is not None:
+                        logger.error(f"Error searching {source}: {task.exception()}")
+                        yield source, "failed", []
+                        continue
+                    products = task.result()
+                    logger.info(f"Completed search on {source} with {len(products)} results")
+                    yield source, "ok", products
 
-            logger.debug(f"Parsed price: {result} {currency} (from {price_str})")
-            return result, currency
-        
-        except ValueError as e:
-            logger.error(f"Could not parse price: {price_str}, error: {e}")
-            return None, currency
+            for task in pending:
+                task.cancel()
+                logger.warning(f"Search on {tasks[task]} cancelled at the {deadline_ms} ms deadline")
+                yield tasks[task], "timed_out", []
+        finally:
+            # Also reached when the consumer stops iterating early
+            for task in pending:
+                task.cancel()
 
-    async def search_products(self, query: str) -> List[Dict]:
-        """Search for products across multiple platforms."""
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            # Submit search tasks to the executor
-            amazon_future = executor.submit(self.search_amazon, query)
-            ebay_future = executor.submit(self.search_ebay, query)
-            jumia_future = executor.submit(self.search_jumia, query)
-            kilimall_future = executor.submit(self.search_kilimall, query)
-            
-            # Get results from all sources
-            amazon_results = amazon_future.result()
-            ebay_results = ebay_future.result()
-            jumia_results = jumia_future.result()
-            kilimall_results = kilimall_future.result()
-        
-        # Combine and normalize results
-        all_results = amazon_results + ebay_results + jumia_results + kilimall_results
-        
-        # Normalize prices (ensure all have USD and KES values)
-        for product in all_results:
-            if product['currency'] == 'USD':
-                if 'price_kes' not in product or not product['price_kes']:
-                    product['price_kes'] = product['price'] * self.usd_to_kes
-                product['price_usd'] = product['price']
-            elif product['currency'] == 'KES':
-                if 'price_usd' not in product or not product['price_usd']:
-                    product['price_usd'] = product['price'] / self.usd_to_kes
-                product['price_kes'] = product['price']
-            else:
-                # Handle other currencies (simplified)
-                product['price_usd'] = product['price']
-                product['price_kes'] = product['price'] * self.usd_to_kes
-        
-        # Sort by USD price
-        all_results.sort(key=lambda x: x['price_usd'])
-        return all_results
-    
+    async def search_batch(
+        self,
+        query: str,
+        deadline_ms: Optional[int] = None,
+        sources: Optional[Collection[str]] = None,
+    ) -> Tuple[ProductBatch, Dict[str, str]]:
+        """Search every platform within an optional deadline.
 
-    def search_amazon(self, query: str) -> List[Dict]:
-        """Search Amazon for products."""
-        url = f"https://www.amazon.com/s?k={quote_plus(query)}"
-        results = []
-        
-        html_content = self.make_request(url)
-        if not html_content:
-            return results
-            
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        print("\nAmazon Debug Info:")
-        print(f"Page title: {soup.title.string if soup.title else 'No title found'}")
-        
-        products = (
-            soup.find_all('div', {'data-component-type': 's-search-result'}) or
-            soup.find_all('div', {'class': 'sg-col-4-of-12'}) or
-            soup.find_all('div', {'class': 'sg-col-20-of-24'})
-        )
-        
-        print(f"Found {len(products)} products on Amazon")
-        
-        if len(products) == 0:
-            print("Sample of HTML received:")
-            print(soup.prettify()[:500])
-        
-        for product in products:
-            title_elem = (
-                product.find('span', {'class': 'a-text-normal'}) or
-                product.find('h2', {'class': 'a-size-mini'})
-            )
-            price_elem = (
-                product.find('span', {'class': 'a-price-whole'}) or
-                product.find('span', {'class': 'a-offscreen'}) or
-                product.find('span', {'class': 'a-price'})
-            )
-            
-            # Find product URL
-            url_elem = product.find('a', {'class': 'a-link-normal'})
-            product_url = urljoin(self.amazon_base_url, url_elem['href']) if url_elem else None
-            
-            if title_elem and price_elem and product_url:
-                price, currency = self.clean_price(price_elem.text)
-                if price is not None:
-                    price_kes = price * self.usd_to_kes if currency == 'USD' else None
-                    results.append({
-                        'title': title_elem.text.strip(),
-                        'price': price,
-                        'currency': currency,
-                        'price_kes': price_kes,
-                        'description': '',
-                        'source': 'Amazon',
-                        'url': product_url
-                    })
-                    
-        return results
+        Returns the products as a ProductBatch sorted by USD price and a
+        status per source.
+        """
+        all_results = []
+        statuses = {}
+        async for source, status, products in self.iter_search(query, deadline_ms, sources):
+            statuses[source] = status
+            all_results.extend(products)
 
-    
-    def search_ebay(self, query: str) -> List[Dict]:
-        """Search eBay for products."""
-        url = f"https://www.ebay.com/sch/i.html?_nkw={quote_plus(query)}"
-        results = []
-        
-        html_content = self.make_request(url)
-        if not html_content:
-            return results
-            
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        print("\neBay Debug Info:")
-        print(f"Page title: {soup.title.string if soup.title else 'No title found'}")
-        
-        products = (
-            soup.find_all('div', {'class': 's-item__info'}) or
-            soup.find_all('div', {'class': 'srp-river-result'}) or
-            soup.find_all('li', {'class': 's-item'})
-        )
-        
-        print(f"Found {len(products)} products on eBay")
-        
-        if len(products) == 0:
-            print("Sample of HTML received:")
-            print(soup.prettify()[:500])
-        
-        for product in products:
-            title_elem = (
-                product.find('div', {'class': 's-item__title'}) or
-                product.find('h3', {'class': 's-item__title'})
-            )
-            price_elem = product.find('span', {'class': 's-item__price'})
-            
-            # Find product URL
-            url_elem = product.find('a', {'class': 's-item__link'})
-            product_url = url_elem['href'] if url_elem else None
-            
-            if title_elem and price_elem and product_url:
-                price, currency = self.clean_price(price_elem.text)
-                if price is not None:
-                    price_kes = price * self.usd_to_kes if currency == 'USD' else None
-                    results.append({
-                        'title': title_elem.text.strip(),
-                        'price': price,
-                        'currency': currency,
-                        'price_kes': price_kes,
-                        'description': '',
-                        'source': 'eBay',
-                        'url': product_url
-                    })
-                    
-        return results
+        await self.fx.ensure_rates()
+        batch = ProductBatch.from_records(all_results).convert(self.fx.rates)
+        return batch.sort_by_usd(), statuses
 
-    def search_jumia(self, query: str) -> List[Dict]:
-        """Search Jumia Kenya for products."""
-        url = f"https://www.jumia.co.ke/catalog/?q={quote_plus(query)}"
-        results = []
-    
-        html_content = self.make_request(url)
-        if not html_content:
-            return results
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
-    
-        print("\nJumia Debug Info:")
-        print(f"Page title: {soup.title.string if soup.title else 'No title found'}")
-        
-        # Jumia product elements
-        products = (
-            soup.find_all('article', {'class': 'prd'}) or
-            soup.find_all('div', {'class': 'info'})
-        )
-    
-        print(f"Found {len(products)} products on Jumia")
-    
-        if len(products) == 0:
-            print("Sample of HTML received:")
-            print(soup.prettify()[:500])
-    
-        for product in products:
-            # Try different possible selectors for Jumia product info
-            title_elem = product.find('h3', {'class': 'name'})
-            price_elem = product.find('div', {'class': 'prc'})
-        
-        # Find product URL - safer approach
-        url_elem = product.find('a')
-        
-        # Debug the URL element
-        if url_elem:
-            print(f"URL element attributes: {url_elem.attrs}")
-            product_url = None
-            # Check if href exists before accessing it
-            if 'href' in url_elem.attrs:
-                product_url = urljoin(self.jumia_base_url, url_elem['href'])
-            else:
-                # Try to find parent with href if the direct element doesn't have it
-                parent_with_href = product.find_parent('a', href=True)
-                if parent_with_href:
-                    product_url = urljoin(self.jumia_base_url, parent_with_href['href'])
-        else:
-            product_url = None
-            print("No URL element found for this product")
-        
-        if title_elem and price_elem and product_url:
-            price, currency = self.clean_price(price_elem.text, 'KES')  # Jumia Kenya uses KES
-            if price is not None:
-                price_usd = price / self.usd_to_kes if currency == 'KES' else None
-                results.append({
-                    'title': title_elem.text.strip(),
-                    'price': price,
-                    'currency': currency,
-                    'price_usd': price_usd,
-                    'price_kes': price,  # Original price already in KES
-                    'description': '',
-                    'source': 'Jumia',
-                    'url': product_url
-                })
-                
-        return results
+    async def search_with_status(
+        self,
+        query: str,
+        deadline_ms: Optional[int] = None,
+        sources: Optional[Collection[str]] = None,
+    ) -> Tuple[List[ProductRecord], Dict[str, str]]:
+        """Like search_batch, with the products as records."""
+        batch, statuses = await self.search_batch(query, deadline_ms, sources)
+        return batch.to_products(), statuses
 
+    async def search_products(self, query: str, deadline_ms: Optional[int] = None) -> ProductBatch:
+        """Search for products across multiple platforms, sorted by USD price."""
+        batch, _ = await self.search_batch(query, deadline_ms)
+        return batch
+    
 
-    def search_kilimall(self, query: str) -> List[Dict]:
-        """Search Kilimall Kenya for products."""
-        url = f"https://www.kilimall.co.ke/new/commoditysearch?q={quote_plus(query)}"
-        results = []
-        
-        html_content = self.make_request(url)
+    async def search_retailer(self, adapter: RetailerAdapter, query: str) -> List[ProductRecord]:
+        """Fetch a retailer's search page on the event loop and parse it in the parser pool."""
+        if adapter.stream and adapter.extractor.can_stream:
+            return await self.stream_retailer(adapter, query)
+        html_content = await self.make_request(adapter.url_for(query))
         if not html_content:
-            return results
-            
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        print("\nKilimall Debug Info:")
-        print(f"Page title: {soup.title.string if soup.title else 'No title found'}")
-        
-        # Kilimall product elements
-        products = (
-            soup.find_all('div', {'class': 'item_box'}) or
-            soup.find_all('li', {'class': 'item'})
-        )
-        
-        print(f"Found {len(products)} products on Kilimall")
-        
-        if len(products) == 0:
-            print("Sample of HTML received:")
-            print(soup.prettify()[:500])
-        
-        for product in products:
-            title_elem = product.find('div', {'class': 'goods-name'})
-            price_elem = product.find('div', {'class': 'price'})
-            
-            # Find product URL
-            url_elem = product.find('a', {'class': 'goods-name-link'})
-            product_url = urljoin(self.kilimall_base_url, url_elem['href']) if url_elem else None
-            
-            if title_elem and price_elem and product_url:
-                price, currency = self.clean_price(price_elem.text, 'KES')  # Kilimall Kenya uses KES
-                if price is not None:
-                    price_usd = price / self.usd_to_kes if currency == 'KES' else None
-                    results.append({
-                        'title': title_elem.text.strip(),
-                        'price': price,
-                        'currency': currency,
-                        'price_usd': price_usd,
-                        'price_kes': price,  # Original price already in KES
-                        'description': '',
-                        'source': 'Kilimall',
-                        'url': product_url
-                    })
-                    
-        return results
+            # Reported as "failed", so it is not cached as an empty result
+            raise ValueError(f"no response from {adapter.host}")
+        return await self.parser_pool.parse(adapter.spec, html_content)
 
-    def search_products(self, query: str) -> pd.DataFrame:
-        """Search for products across multiple platforms and return sorted results."""
-        print("\nSearching Amazon...")
-        amazon_results = self.search_amazon(query)
-        
-        print("\nSearching eBay...")
-        ebay_results = self.search_ebay(query)
-        
-        print("\nSearching Jumia...")
-        jumia_results = self.search_jumia(query)
-        
-        print("\nSearching Kilimall...")
-        kilimall_results = self.search_kilimall(query)
-        
-        all_results = amazon_results + ebay_results + jumia_results + kilimall_results
-        
-        if not all_results:
-            print("\nNo results found with valid prices")
-            return pd.DataFrame(columns=['title', 'price', 'currency', 'price_usd', 'price_kes', 'description', 'source', 'url'])
-            
-        df = pd.DataFrame(all_results)
-        
-        # Format prices for display
-        if 'price_kes' in df.columns:
-            df['price_kes'] = df['price_kes'].apply(lambda x: f"{x:.2f} KES" if pd.notnull(x) else "N/A")
-        
-        if 'price_usd' in df.columns:
-            df['price_usd'] = df['price_usd'].apply(lambda x: f"{x:.2f} USD" if pd.notnull(x) else "N/A")
-            
-        # Format original prices with currency
-        df['display_price'] = df.apply(
-            lambda row: f"{row['price']:.2f} {row['currency']}", axis=1
-        )
-        
-        # Sort by price (convert all to USD for sorting)
-        if 'currency' in df.columns:
-            def get_usd_price(row):
-                if row['currency'] == 'USD':
-                    return row['price']
-                elif row['currency'] == 'KES':
-                    return row['price'] / self.usd_to_kes
-                else:
-                    return row['price']  # Fallback
-                    
-            df['sort_price'] = df.apply(get_usd_price, axis=1)
-            df = df.sort_values('sort_price')
-            df = df.drop('sort_price', axis=1)
-        else:
-            df = df.sort_values('price')
-            
-        return df
+    async def stream_retailer(self, adapter: RetailerAdapter, query: str) -> List[ProductRecord]:
+        """Parse a search page while it downloads, stopping at the product cap.
 
-def main():
+        Chunks are collected into batches of ``STREAM_PARSE_BATCH`` bytes and
+        fed to an incremental lxml parser off the event loop. This is meant
+        for large pages where only the first ``max_products`` cards are used:
+        the connection is dropped as soon as they have been parsed, saving
+        the rest of the transfer and its parse.
+        """
+        url = adapter.url_for(query)
+        loop = asyncio.get_running_loop()
+        # An lxml parser and its tree must stay on the thread that created
+        # them, so each page is parsed by a worker thread of its own rather
+        # than on the shared IO pool
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream")
+        extraction = None
+        try:
+            extraction = await loop.run_in_executor(executor, adapter.extractor.stream)
+            pending: List[bytes] = []
+            pending_bytes = 0
+            async with aclosing(self.http.stream(url, headers=self.request_headers())) as chunks:
+                async for chunk in chunks:
+                    pending.append(chunk)
+                    pending_bytes += len(chunk)
+                    if pending_bytes < STREAM_PARSE_BATCH:
+                        continue
+                    await loop.run_in_executor(executor, extraction.feed, b"".join(pending))
+                    pending.clear()
+                    pending_bytes = 0
+                    if extraction.done:
+                        logger.debug(
+                            f"{adapter.name}: reached {adapter.max_products} products after "
+                            f"{extraction.bytes_fed / 1024:.0f} KB, closing {url}"
+                        )
+                        break
+            if pending:
+                await loop.run_in_executor(executor, extraction.feed, b"".join(pending))
+            if not extraction.bytes_fed:
+                raise ValueError(f"no response from {adapter.host}")
+            return await loop.run_in_executor(executor, extraction.close)
+        finally:
+            if extraction is not None:
+                # Freed on its own thread too, after a feed cut short by a
+                # cancellation has finished there
+                executor.submit(extraction.release)
+            executor.shutdown(wait=False)
+
+async def main():
     scraper = ScraperService()
     
     while True:
@@ -461,7 +215,8 @@ def main():
             break
             
         print("\nSearching for products...")
-        results = scraper.search_products(query)
+        batch, _ = await scraper.search_batch(query)
+        results = pd.DataFrame(batch.to_records(display=True))
         
         if len(results) == 0:
             print("No results found.")
@@ -472,9 +227,12 @@ def main():
         pd.set_option('display.width', None)
         print("\nResults (sorted by price):")
         # Reorder columns for better display
-        display_cols = ['title', 'display_price', 'price_usd', 'price_kes', 'source', 'url']
+        display_cols = ['title', 'display_price', 'price_usd_display', 'price_kes_display', 'source', 'url']
         display_cols = [col for col in display_cols if col in results.columns]
         print(results[display_cols].to_string(index=False))
 
+    await scraper.http.aclose()
+    scraper.parser_pool.shutdown()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
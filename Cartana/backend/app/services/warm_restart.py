@@ -0,0 +1,103 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Optional
+
+from .cache import CacheEntry, MemoryCache
+from .fx_service import FxService
+
+logger = logging.getLogger(__name__)
+
+# File layout (little-endian):
+#   magic (8s) | header length (I) | entry count (I)
+#   header: JSON with the FX table and when the snapshot was taken
+#   per entry: fresh_until (d) | expires_at (d) | key length (I) | value length (I)
+#              | key (UTF-8) | value (compact JSON)
+# Entries are written least recently used first, so restoring them in order
+# rebuilds the same LRU order.
+_MAGIC = b"CRTSNAP1"
+_FILE_HEADER = struct.Struct("<8sII")
+_ENTRY_HEADER = struct.Struct("<ddII")
+
+
+def save_warm_snapshot(path: str, memory: Optional[MemoryCache], fx: Optional[FxService]) -> Dict:
+    """Write the memory cache tier and the FX table to ``path`` at shutdown."""
+    start = time.perf_counter()
+    header = {"created_at": time.time()}
+    if fx is not None and fx.rates:
+        header["fx"] = {"rates": fx.rates, "updated_at": fx.updated_at}
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+
+    entries = list(memory.items()) if memory is not None else []
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + ".tmp"
+    size = 0
+    with open(tmp_path, 'wb') as snapshot_file:
+        snapshot_file.write(_FILE_HEADER.pack(_MAGIC, len(header_bytes), len(entries)))
+        snapshot_file.write(header_bytes)
+        for key, entry in entries:
+            key_bytes = key.encode('utf-8')
+            value_bytes = json.dumps(entry.value, separators=(',', ':')).encode('utf-8')
+            snapshot_file.write(_ENTRY_HEADER.pack(entry.fresh_until, entry.expires_at, len(key_bytes), len(value_bytes)))
+            snapshot_file.write(key_bytes)
+            snapshot_file.write(value_bytes)
+        size = snapshot_file.tell()
+    os.replace(tmp_path, path)
+
+    stats = {"saved_entries": len(entries), "saved_bytes": size, "save_ms": round((time.perf_counter() - start) * 1000, 1)}
+    logger.info(f"Saved warm restart snapshot to {path}: {stats}")
+    return stats
+
+
+def load_warm_snapshot(path: str, memory: Optional[MemoryCache], fx: Optional[FxService]) -> Dict:
+    """Restore the snapshot written at the last shutdown, then remove it.
+
+    The file is memory-mapped and read in place; entries past their hard
+    TTL are skipped without decoding, and the rest keep their original
+    expiry times. The snapshot is consumed so that after a crash an older
+    one is never restored over newer disk-tier entries.
+    """
+    stats = {"restored_entries": 0, "expired_entries": 0, "fx_restored": False}
+    if not path or not os.path.exists(path):
+        return stats
+    start = time.perf_counter()
+    now = time.time()
+    try:
+        with open(path, 'rb') as snapshot_file, \
+                mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            magic, header_length, count = _FILE_HEADER.unpack_from(view, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"not a snapshot file (magic {magic!r})")
+            offset = _FILE_HEADER.size
+            header = json.loads(view[offset:offset + header_length])
+            offset += header_length
+
+            if fx is not None and header.get("fx"):
+                stats["fx_restored"] = fx.restore(header["fx"]["rates"], header["fx"]["updated_at"])
+
+            for _ in range(count):
+                fresh_until, expires_at, key_length, value_length = _ENTRY_HEADER.unpack_from(view, offset)
+                offset += _ENTRY_HEADER.size
+                if memory is not None and expires_at > now:
+                    key = view[offset:offset + key_length].decode('utf-8')
+                    value_start = offset + key_length
+                    value = json.loads(view[value_start:value_start + value_length])
+                    memory.set(key, CacheEntry(value, fresh_until, expires_at), value_length)
+                    stats["restored_entries"] += 1
+                else:
+                    stats["expired_entries"] += 1
+                offset += key_length + value_length
+    except (OSError, ValueError, struct.error) as e:
+        logger.error(f"Could not load warm restart snapshot {path}: {e}")
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    stats["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info(f"Loaded warm restart snapshot from {path}: {stats}")
+    return stats
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..config import (
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_INTERVAL,
+    WRITE_BEHIND_MAX_PENDING,
+    WRITE_BEHIND_MAX_RETRIES,
+    WRITE_BEHIND_RETRY_BACKOFF,
+)
+from ..utils.metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Accept writes immediately and persist them later in bulk.
+
+    ``submit`` only appends to an in-memory queue. A background task hands
+    everything queued to ``write`` in batches of about ``batch_size`` (as
+    counted by ``weight``, e.g. product rows), as soon as that many are
+    waiting or every ``flush_interval`` seconds otherwise, so inserts from
+    many searches are coalesced into a few large ones. A failed batch is
+    retried with exponential backoff and dropped after ``max_retries``.
+    ``stop`` drains the queue before returning.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[Any]], Awaitable[Any]],
+        name: str,
+        weight: Callable[[Any], int] = lambda item: 1,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+        max_retries: int = WRITE_BEHIND_MAX_RETRIES,
+        retry_backoff: float = WRITE_BEHIND_RETRY_BACKOFF,
+    ):
+        self.write = write
+        self.name = name
+        self.weight = weight
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._items: Deque[Tuple[Any, int]] = deque()
+        self.pending = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.flush_latency = LatencyStats()
+        self.batches = 0
+        self.written = 0
+        self.retries = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, item: Any) -> bool:
+        """Queue ``item``; False if the queue is full and it was dropped."""
+        weight = self.weight(item)
+        if self.pending + weight > self.max_pending:
+            self.dropped += weight
+            logger.warning(f"Write-behind queue {self.name} is full ({self.pending} pending), dropping a write")
+            return False
+        self._items.append((item, weight))
+        self.pending += weight
+        if self.pending >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued, then stop the background task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        logger.info(f"Write-behind queue {self.name} drained: {self.snapshot()}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._items:
+                await self._flush_batch()
+            if self._stopping:
+                return
+
+    async def _flush_batch(self):
+        batch = []
+        weight = 0
+        while self._items and (not batch or weight + self._items[0][1] <= self.batch_size):
+            item, item_weight = self._items.popleft()
+            batch.append(item)
+            weight += item_weight
+        self.pending -= weight
+
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                await self.write(batch)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += weight
+                    logger.error(f"Write-behind queue {self.name} gave up on {weight} rows after {attempt + 1} attempts: {e}")
+                    return
+                self.retries += 1
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"Write-behind queue {self.name} flush failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            self.flush_latency.record((time.perf_counter() - start) * 1000)
+            self.batches += 1
+            self.written += weight
+            return
+
+    def snapshot(self) -> Dict:
+        return {
+            "queue_depth": len(self._items),
+            "pending_rows": self.pending,
+            "batches": self.batches,
+            "written_rows": self.written,
+            "retries": self.retries,
+            "failed_rows": self.failed,
+            "dropped_rows": self.dropped,
+            "flush": self.flush_latency.snapshot(),
+        }
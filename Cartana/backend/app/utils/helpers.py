@@ -0,0 +1,221 @@
+import re
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case a search query and collapse its whitespace."""
+    return " ".join(query.lower().split())
+
+
+def parse_timestamp(value: str) -> float:
+    """Epoch seconds of an ISO timestamp; one without an offset is taken as UTC (SQLite)."""
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def clean_price(price_str: str, currency: str = 'USD') -> Tuple[Optional[float], str]:
+    """Extract and clean price from string, returning float value and currency."""
+    if not price_str:
+        return None, currency
+
+    # Determine currency from string
+    if 'KSh' in price_str or 'Ksh' in price_str or 'KES' in price_str:
+        currency = 'KES'
+    elif '£' in price_str or 'GBP' in price_str:
+        currency = 'GBP'
+    elif '€' in price_str or 'EUR' in price_str:
+        currency = 'EUR'
+
+    # Remove all non-numeric characters except periods and commas
+    digits_only = re.sub(r'[^\d.,]', '', price_str)
+
+    try:
+        # Handle scientific notation
+        if 'e' in digits_only.lower():
+            return float(digits_only), currency
+
+        # Determine decimal separator
+        last_comma_pos = digits_only.rfind(',')
+        last_period_pos = digits_only.rfind('.')
+
+        if last_comma_pos > 0 and last_period_pos > 0:
+            if last_comma_pos > last_period_pos:
+                # European format (comma is decimal separator)
+                cleaned = digits_only.replace('.', '').replace(',', '.')
+            else:
+                # US format (period is decimal separator)
+                cleaned = digits_only.replace(',', '')
+        elif last_comma_pos > 0:
+            if len(digits_only) - last_comma_pos <= 3:
+                # Likely a decimal comma
+                cleaned = digits_only.replace(',', '.')
+            else:
+                # Likely a thousands separator
+                cleaned = digits_only.replace(',', '')
+        else:
+            # Only periods or no separators
+            cleaned = digits_only
+
+        result = float(cleaned)
+
+        # Heuristic for unreasonably large prices
+        if result > 10000 and '.' in cleaned:
+            parts = cleaned.split('.')
+            if len(parts) == 2 and len(parts[0]) > 2:
+                candidates = []
+                if len(parts[0]) > 2:
+                    test_price = float(parts[0][:-2] + '.' + parts[0][-2:] + parts[1])
+                    candidates.append((test_price, abs(test_price - 100)))
+
+                if candidates:
+                    candidates.sort(key=lambda x: x[1])
+                    alternate_result = candidates[0][0]
+                    if alternate_result < result / 10:
+                        logger.info(f"Price correction: {result} -> {alternate_result}")
+                        result = alternate_result
+
+        logger.debug(f"Parsed price: {result} {currency} (from {price_str})")
+        return result, currency
+
+    except ValueError as e:
+        logger.error(f"Could not parse price: {price_str}, error: {e}")
+        return None, currency
+
+
+_NON_PRICE_CHARS = re.compile(r'[^\d.,\x00]+')
+_NON_PRICE_BYTES = bytes(c for c in range(128) if chr(c) not in '0123456789.,\x00')
+
+
+def clean_prices(
+    price_strs: Iterable[Optional[str]], currency: Union[str, Sequence[str]] = 'USD'
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Batch version of clean_price for a page or a whole search.
+
+    Returns a float64 array of prices (NaN where clean_price returns None)
+    and an array of currency codes. ``currency`` is the default code, either
+    one for all rows or one per row. Results are identical to calling
+    clean_price on each string: all strings are stripped in a single
+    pass, separators are resolved with numpy string operations, and
+    the rare rows with non-ASCII digits go through clean_price.
+    """
+    strs = ['' if s is None else s for s in price_strs]
+    n = len(strs)
+    defaults = np.broadcast_to(np.asarray(currency, dtype=object), (n,))
+    if n == 0:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=object)
+
+    joined = '\x00'.join(strs)
+    if joined.count('\x00') != n - 1:
+        # A NUL inside a price string would break the split below
+        return _clean_prices_scalar(strs, defaults)
+    raw = np.array(strs, dtype=np.str_)
+
+    # Currency markers, in clean_price's order of precedence
+    currencies = np.array(defaults, dtype=object)
+    is_eur = (np.strings.find(raw, '€') >= 0) | (np.strings.find(raw, 'EUR') >= 0)
+    is_gbp = (np.strings.find(raw, '£') >= 0) | (np.strings.find(raw, 'GBP') >= 0)
+    is_kes = (
+        (np.strings.find(raw, 'KSh') >= 0) | (np.strings.find(raw, 'Ksh') >= 0) |
+        (np.strings.find(raw, 'KES') >= 0)
+    )
+    currencies[is_eur] = 'EUR'
+    currencies[is_gbp] = 'GBP'
+    currencies[is_kes] = 'KES'
+
+    scalar_rows = np.zeros(n, dtype=bool)
+    if joined.isascii():
+        # Same result as the regex, without per-match overhead
+        digits_only = joined.encode('ascii').translate(None, _NON_PRICE_BYTES).decode('ascii')
+    else:
+        digits_only = _NON_PRICE_CHARS.sub('', joined)
+    pieces = digits_only.split('\x00')
+    if not digits_only.isascii():
+        # float() accepts any Unicode digit; numpy's parser only ASCII ones
+        scalar_rows = np.array([not piece.isascii() for piece in pieces])
+    digits = np.array(pieces, dtype=np.str_)
+
+    # Decimal separator heuristic (positions > 0, exactly as clean_price)
+    last_comma = np.strings.rfind(digits, ',')
+    last_period = np.strings.rfind(digits, '.')
+    length = np.strings.str_len(digits)
+    both = (last_comma > 0) & (last_period > 0)
+    european = both & (last_comma > last_period)
+    comma_only = ~both & (last_comma > 0)
+    decimal_comma = european | (comma_only & (length - last_comma <= 3))
+    drop_commas = (both & ~european) | (comma_only & ~decimal_comma)
+
+    cleaned = digits.copy()
+    _replace_where(cleaned, european, '.', '')
+    _replace_where(cleaned, decimal_comma, ',', '.')
+    _replace_where(cleaned, drop_commas, ',', '')
+
+    # Anything float() would reject: leftover commas, several periods or no digits
+    periods = np.strings.count(cleaned, '.')
+    valid = (
+        (np.strings.count(cleaned, ',') == 0) & (periods <= 1) &
+        (np.strings.str_len(cleaned) - periods > 0) & ~scalar_rows
+    )
+    values = np.full(n, np.nan)
+    values[valid] = cleaned[valid].astype(np.float64)
+
+    # Heuristic for unreasonably large prices: re-read "12345.67" as
+    # "123.4567" and keep that if it's under a tenth of the original
+    point = np.strings.find(cleaned, '.')
+    large = np.flatnonzero(valid & (values > 10000) & (periods == 1) & (point > 2))
+    if large.size:
+        shifted = _shift_decimal_point(cleaned[large], point[large])
+        corrected = shifted < values[large] / 10
+        if corrected.any():
+            logger.info(f"Price correction applied to {int(corrected.sum())} prices")
+        values[large[corrected]] = shifted[corrected]
+
+    for i in np.flatnonzero(scalar_rows):
+        value, currencies[i] = clean_price(strs[i], defaults[i])
+        values[i] = np.nan if value is None else value
+
+    invalid = ~valid & ~scalar_rows & (np.strings.str_len(raw) > 0)
+    if invalid.any():
+        logger.error(f"Could not parse {int(invalid.sum())} of {n} prices, e.g. {strs[int(np.argmax(invalid))]!r}")
+    logger.debug(f"Parsed {n} prices ({int(scalar_rows.sum())} via clean_price)")
+    return values, currencies
+
+
+def _replace_where(strings: np.ndarray, mask: np.ndarray, old: str, new: str):
+    """In-place str.replace on the selected rows (none of them grow)."""
+    if mask.any():
+        strings[mask] = np.strings.replace(strings[mask], old, new)
+
+
+def _shift_decimal_point(cleaned: np.ndarray, point: np.ndarray) -> np.ndarray:
+    """Parse each string with its decimal point moved two digits left.
+
+    The strings are viewed as a matrix of characters so the new strings are
+    built with index arithmetic, then parsed like clean_price parses them.
+    """
+    width = cleaned.dtype.itemsize // 4
+    chars = np.ascontiguousarray(cleaned).view('U1').reshape(len(cleaned), width)
+    column = np.arange(width)
+    insert_at = (point - 2)[:, None]
+    # Characters between the new and old point move one place right
+    source = np.where((column > insert_at) & (column <= point[:, None]), column - 1, column)
+    shifted = np.take_along_axis(chars, source, axis=1)
+    shifted[column == insert_at] = '.'
+    return shifted.view(f'U{width}').ravel().astype(np.float64)
+
+
+def _clean_prices_scalar(strs: Sequence[str], defaults: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    values = np.full(len(strs), np.nan)
+    currencies = np.empty(len(strs), dtype=object)
+    for i, price_str in enumerate(strs):
+        value, currencies[i] = clean_price(price_str, defaults[i])
+        if value is not None:
+            values[i] = value
+    return values, currencies
@@ -0,0 +1,26 @@
+from typing import Dict
+
+
+class LatencyStats:
+    """Running count / average / max of durations, in milliseconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.last_ms = duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_ms": round(self.last_ms, 3),
+        }
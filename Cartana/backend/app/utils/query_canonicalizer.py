@@ -0,0 +1,159 @@
+import re
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from .helpers import normalize_query
+
+# Words that do not narrow a product search
+STOPWORDS = frozenset({
+    "a", "an", "and", "the", "for", "with", "of", "in", "on", "to", "by", "from", "buy", "&",
+})
+
+# Spellings of the same brand or product line, matched on whole words after
+# punctuation is removed and before plurals are folded
+BRAND_ALIASES = {
+    "i phone": "iphone",
+    "apple iphone": "iphone",
+    "air pods": "airpods",
+    "apple airpods": "airpods",
+    "mac book": "macbook",
+    "apple macbook": "macbook",
+    "play station": "playstation",
+    "ps 5": "playstation 5",
+    "ps5": "playstation 5",
+    "ps 4": "playstation 4",
+    "ps4": "playstation 4",
+    "hewlett packard": "hp",
+    "lg electronics": "lg",
+    "samsung galaxy": "galaxy",
+    "free pods": "freepods",
+    "x box": "xbox",
+}
+
+# Words the plural rules below would mangle
+INVARIANT_WORDS = frozenset({"series", "species", "news", "lens", "chassis", "canvas", "headphones"})
+
+# "128 GB" and "128gb" are the same product
+_UNIT = re.compile(r"\b(\d+)\s+(gb|tb|mb|mah|w|hz|mm|cm|inch|in|l|kg)\b")
+# Keep "+" (e.g. "note 10+") and decimal points inside numbers
+_SEPARATORS = re.compile(r"[^\w+.]+|(?<!\d)\.|\.(?!\d)|_")
+_APOSTROPHES = re.compile(r"['’`]")
+
+
+def _fold_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return unicodedata.normalize("NFKC", "".join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+def singular(token: str) -> str:
+    """Fold common English plurals: cases -> case, batteries -> battery, boxes -> box."""
+    if len(token) <= 3 or not token.isalpha() or token in INVARIANT_WORDS:
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+class QueryCanonicalizer:
+    """Map search queries that mean the same thing onto one key.
+
+    "iPhone 15 case", "iphone  15 cases" and "case for i-phone 15" all become
+    "15 case iphone": Unicode (NFKC, accents) and case folding, punctuation
+    and whitespace collapse, brand aliases, plural folding, stopword removal
+    and token sort. The key is used for the result cache, the ``searches``
+    table and single-flight; the raw query is still what gets scraped.
+
+    ``key()`` also records which raw queries mapped to each key, so the hit
+    rate gained over plain lower-casing can be measured.
+    """
+
+    def __init__(
+        self,
+        aliases: Mapping[str, str] = BRAND_ALIASES,
+        stopwords: Iterable[str] = STOPWORDS,
+        max_tracked: int = 10000,
+        max_variants: int = 32,
+    ):
+        # Longest aliases first so "apple iphone" wins over "iphone"-style overlaps
+        self.aliases = sorted(aliases.items(), key=lambda item: -len(item[0]))
+        self.stopwords = frozenset(stopwords)
+        self.max_tracked = max_tracked
+        self.max_variants = max_variants
+        # canonical key -> Counter of normalized raw queries, least recent first
+        self._variants: "OrderedDict[str, Counter]" = OrderedDict()
+        self.lookups = 0
+        self.merged = 0
+
+    def canonicalize(self, query: str) -> str:
+        text = _fold_accents(query).casefold()
+        text = _APOSTROPHES.sub("", text)
+        text = " ".join(_SEPARATORS.sub(" ", text).split())
+        text = _UNIT.sub(r"\1\2", text)
+
+        padded = f" {text} "
+        for alias, target in self.aliases:
+            padded = padded.replace(f" {alias} ", f" {target} ")
+
+        tokens = [singular(token) for token in padded.split()]
+        kept = [token for token in tokens if token not in self.stopwords]
+        # A query made only of stopwords still needs a key
+        return " ".join(sorted(set(kept or tokens)))
+
+    def key(self, query: str) -> str:
+        """Canonical key for ``query``, recorded for hit-rate analytics."""
+        canonical = self.canonicalize(query)
+        self.record(query, canonical)
+        return canonical
+
+    def record(self, query: str, canonical: str):
+        self.lookups += 1
+        raw = normalize_query(query)
+        variants = self._variants.get(canonical)
+        if variants is None:
+            variants = self._variants[canonical] = Counter()
+            if len(self._variants) > self.max_tracked:
+                self._variants.popitem(last=False)
+        else:
+            self._variants.move_to_end(canonical)
+            if raw not in variants:
+                # Lower-cased keys would have missed here; the canonical key can hit
+                self.merged += 1
+        if raw in variants or len(variants) < self.max_variants:
+            variants[raw] += 1
+
+    def variants(self, canonical: str) -> Dict[str, int]:
+        return dict(self._variants.get(canonical, {}))
+
+    def top_merged(self, limit: int = 10) -> List[Dict]:
+        """Canonical keys that absorbed the most distinct raw spellings."""
+        merged = [(canonical, variants) for canonical, variants in self._variants.items() if len(variants) > 1]
+        merged.sort(key=lambda item: (-len(item[1]), -sum(item[1].values())))
+        return [
+            {"canonical": canonical, "variants": dict(variants.most_common())}
+            for canonical, variants in merged[:limit]
+        ]
+
+    def snapshot(self) -> Dict:
+        return {
+            "lookups": self.lookups,
+            "canonical_keys": len(self._variants),
+            "raw_variants": sum(len(variants) for variants in self._variants.values()),
+            "merged_lookups": self.merged,
+            "top_merged": self.top_merged(5),
+        }
+
+
+_shared_canonicalizer: Optional[QueryCanonicalizer] = None
+
+
+def get_query_canonicalizer() -> QueryCanonicalizer:
+    """Return the process-wide canonicalizer, creating it on first use."""
+    global _shared_canonicalizer
+    if _shared_canonicalizer is None:
+        _shared_canonicalizer = QueryCanonicalizer()
+    return _shared_canonicalizer
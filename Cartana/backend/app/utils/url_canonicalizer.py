@@ -0,0 +1,48 @@
+import re
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only record how the visitor reached the listing
+TRACKING_PARAMS = frozenset({
+    "ref", "ref_", "source", "spm", "hash", "qid", "sr", "keywords", "crid", "sprefix",
+    "th", "psc", "dib", "dib_tag", "content-id", "itmmeta", "amdata", "epid",
+    "fbclid", "gclid", "msclkid", "igshid", "scm",
+})
+TRACKING_PREFIXES = ("utm_", "pd_rd_", "pf_rd_", "_trk", "mkevt", "mkcid", "mkrid", "campid", "toolid")
+
+# Amazon listings are identified by the ASIN, wherever it appears in the
+# link (sponsored results wrap it in /sspa/click?url=...)
+_AMAZON_ASIN = re.compile(r"/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?:[/?&]|$)")
+# eBay listings by the item number, with or without the title slug
+_EBAY_ITEM = re.compile(r"/itm/(?:[^/?]+/)?(\d{9,})")
+
+
+def _is_tracking(param: str) -> bool:
+    param = param.lower()
+    return param in TRACKING_PARAMS or param.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    """The URL that identifies a product listing, whichever search found it.
+
+    Lower-cases the scheme and host, drops the fragment and tracking
+    parameters, and sorts the parameters that remain, so "?skuId=1&source=a"
+    and "?source=b&skuId=1" are one listing. Amazon and eBay links reduce to
+    their item id.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = parts.netloc.lower()
+
+    if "amazon." in host:
+        match = _AMAZON_ASIN.search(unquote(url))
+        if match:
+            return f"{scheme}://{host}/dp/{match.group(1)}"
+    elif "ebay." in host:
+        match = _EBAY_ITEM.search(parts.path)
+        if match:
+            return f"{scheme}://{host}/itm/{match.group(1)}"
+
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(key)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(params), ""))
@@ -0,0 +1,98 @@
+"""Compare the old pandas result pipeline with ProductBatch.
+
+Run from Cartana/backend:
+
+    python -m benchmarks.batch_benchmark [rows]
+
+The pandas version is the DataFrame/apply code ProductScraper.search_products
+used before, followed by the to_dict conversion the services did. Both
+produce the response records, and the script checks they agree.
+"""
+import random
+import sys
+import time
+
+import pandas as pd
+
+from app.models.product_batch import ProductBatch
+from app.models.product_record import ProductRecord
+
+USD_TO_KES = 129.5
+RATES = {"USD": 1.0, "KES": USD_TO_KES}
+SOURCES = [('Amazon', 'USD'), ('eBay', 'USD'), ('Jumia', 'KES'), ('Kilimall', 'KES'), ('Oraimo Kenya', 'KES')]
+
+
+def make_records(rows):
+    rng = random.Random(0)
+    records = []
+    for i in range(rows):
+        source, currency = rng.choice(SOURCES)
+        price = rng.uniform(5, 500) if currency == 'USD' else rng.uniform(500, 60000)
+        records.append(ProductRecord(
+            title=f'Product {i}', price=round(price, 2), currency=currency,
+            source=source, url=f'https://example.com/p/{i}',
+            extra={'sku': f'OR-{i}'} if source == 'Oraimo Kenya' else None,
+        ))
+    return records
+
+
+def normalize(records):
+    """ScraperService.normalize_prices as it was before ProductBatch."""
+    for product in records:
+        if product['currency'] == 'USD':
+            product['price_kes'] = product['price'] * USD_TO_KES
+            product['price_usd'] = product['price']
+        else:
+            product['price_usd'] = product['price'] / USD_TO_KES
+            product['price_kes'] = product['price']
+    return records
+
+
+def pandas_pipeline(records):
+    df = pd.DataFrame(normalize([r.to_dict() for r in records]))
+    df['price_kes_display'] = df['price_kes'].apply(lambda x: f"{x:.2f} KES" if pd.notnull(x) else "N/A")
+    df['price_usd_display'] = df['price_usd'].apply(lambda x: f"{x:.2f} USD" if pd.notnull(x) else "N/A")
+    df['display_price'] = df.apply(lambda row: f"{row['price']:.2f} {row['currency']}", axis=1)
+
+    def get_usd_price(row):
+        if row['currency'] == 'KES':
+            return row['price'] / USD_TO_KES
+        return row['price']
+
+    df['sort_price'] = df.apply(get_usd_price, axis=1)
+    df = df.sort_values('sort_price', kind='stable').drop('sort_price', axis=1)
+    return df.to_dict(orient='records')
+
+
+def batch_pipeline(records):
+    return ProductBatch.from_records(records).convert(RATES).sort_by_usd().to_records(display=True)
+
+
+def bench(label, func, records, iterations):
+    func(records)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        results = func(records)
+    elapsed = (time.perf_counter() - start) / iterations
+    print(f"{label:<8} {elapsed * 1000:8.2f} ms")
+    return elapsed, results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    iterations = max(1, 20000 // rows)
+    records = make_records(rows)
+    print(f"{rows} products, {iterations} iterations")
+
+    pandas_time, pandas_results = bench("pandas", pandas_pipeline, records, iterations)
+    batch_time, batch_results = bench("batch", batch_pipeline, records, iterations)
+    print(f"speedup: {pandas_time / batch_time:.1f}x")
+
+    # pandas fills missing extras with NaN; compare the shared columns
+    keys = ['title', 'price', 'currency', 'source', 'url', 'price_usd', 'price_kes', 'display_price']
+    if [[r[k] for k in keys] for r in pandas_results] != [[r[k] for k in keys] for r in batch_results]:
+        print("WARNING: pandas and batch results differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""BeautifulSoup parsers the lxml extraction engine replaced.
+
+Not used by the app; kept as the reference implementation that
+parse_benchmark compares the extractors against.
+"""
+import logging
+from typing import Callable, Dict, List
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from app.models.product_record import ProductRecord
+from app.utils.helpers import clean_price
+
+logger = logging.getLogger(__name__)
+
+AMAZON_BASE_URL = "https://www.amazon.com"
+JUMIA_BASE_URL = "https://www.jumia.co.ke"
+KILIMALL_BASE_URL = "https://www.kilimall.co.ke"
+
+
+def _log_page(soup: BeautifulSoup, source: str, products: list):
+    logger.debug(f"{source} page title: {soup.title.string if soup.title else 'No title found'}")
+    logger.debug(f"Found {len(products)} products on {source}")
+    if len(products) == 0:
+        logger.debug(f"Sample of HTML received: {soup.prettify()[:500]}")
+
+
+def parse_amazon(html: bytes) -> List[ProductRecord]:
+    """Extract products from an Amazon search page."""
+    results = []
+    soup = BeautifulSoup(html, 'html.parser')
+
+    products = (
+        soup.find_all('div', {'data-component-type': 's-search-result'}) or
+        soup.find_all('div', {'class': 'sg-col-4-of-12'}) or
+        soup.find_all('div', {'class': 'sg-col-20-of-24'})
+    )
+    _log_page(soup, 'Amazon', products)
+
+    for product in products:
+        title_elem = (
+            product.find('span', {'class': 'a-text-normal'}) or
+            product.find('h2', {'class': 'a-size-mini'})
+        )
+        price_elem = (
+            product.find('span', {'class': 'a-price-whole'}) or
+            product.find('span', {'class': 'a-offscreen'}) or
+            product.find('span', {'class': 'a-price'})
+        )
+
+        # Find product URL
+        url_elem = product.find('a', {'class': 'a-link-normal'})
+        product_url = urljoin(AMAZON_BASE_URL, url_elem['href']) if url_elem else None
+
+        if title_elem and price_elem and product_url:
+            price, currency = clean_price(price_elem.text)
+            if price is not None:
+                results.append(ProductRecord(
+                    title=title_elem.text.strip(),
+                    price=price,
+                    currency=currency,
+                    source='Amazon',
+                    url=product_url,
+                ))
+
+    return results
+
+
+def parse_ebay(html: bytes) -> List[ProductRecord]:
+    """Extract products from an eBay search page."""
+    results = []
+    soup = BeautifulSoup(html, 'html.parser')
+
+    products = (
+        soup.find_all('div', {'class': 's-item__info'}) or
+        soup.find_all('div', {'class': 'srp-river-result'}) or
+        soup.find_all('li', {'class': 's-item'})
+    )
+    _log_page(soup, 'eBay', products)
+
+    for product in products:
+        title_elem = (
+            product.find('div', {'class': 's-item__title'}) or
+            product.find('h3', {'class': 's-item__title'})
+        )
+        price_elem = product.find('span', {'class': 's-item__price'})
+
+        # Find product URL
+        url_elem = product.find('a', {'class': 's-item__link'})
+        product_url = url_elem['href'] if url_elem else None
+
+        if title_elem and price_elem and product_url:
+            price, currency = clean_price(price_elem.text)
+            if price is not None:
+                results.append(ProductRecord(
+                    title=title_elem.text.strip(),
+                    price=price,
+                    currency=currency,
+                    source='eBay',
+                    url=product_url,
+                ))
+
+    return results
+
+
+def parse_jumia(html: bytes) -> List[ProductRecord]:
+    """Extract products from a Jumia Kenya search page."""
+    results = []
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Jumia product elements
+    products = (
+        soup.find_all('article', {'class': 'prd'}) or
+        soup.find_all('div', {'class': 'info'})
+    )
+    _log_page(soup, 'Jumia', products)
+
+    for product in products:
+        title_elem = product.find('h3', {'class': 'name'})
+        price_elem = product.find('div', {'class': 'prc'})
+
+        # Find product URL - safer approach
+        url_elem = product.find('a')
+        product_url = None
+        if url_elem:
+            # Check if href exists before accessing it
+            if 'href' in url_elem.attrs:
+                product_url = urljoin(JUMIA_BASE_URL, url_elem['href'])
+            else:
+                # Try to find parent with href if the direct element doesn't have it
+                parent_with_href = product.find_parent('a', href=True)
+                if parent_with_href:
+                    product_url = urljoin(JUMIA_BASE_URL, parent_with_href['href'])
+
+        if title_elem and price_elem and product_url:
+            price, currency = clean_price(price_elem.text, 'KES')  # Jumia Kenya uses KES
+            if price is not None:
+                results.append(ProductRecord(
+                    title=title_elem.text.strip(),
+                    price=price,
+                    currency=currency,
+                    source='Jumia',
+                    url=product_url,
+                ))
+
+    return results
+
+
+def parse_kilimall(html: bytes) -> List[ProductRecord]:
+    """Extract products from a Kilimall Kenya search page."""
+    results = []
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Kilimall product elements (current markup, see app/kilimall_debug.html)
+    products = soup.find_all('div', {'class': 'listing-item'})
+    _log_page(soup, 'Kilimall', products)
+
+    for product in products:
+        title_elem = product.find('p', {'class': 'product-title'})
+        price_elem = product.find('div', {'class': 'product-price'})
+
+        # Find product URL
+        url_elem = product.find('a', href=True)
+        product_url = urljoin(KILIMALL_BASE_URL, url_elem['href']) if url_elem else None
+
+        if title_elem and price_elem and product_url:
+            price, currency = clean_price(price_elem.text, 'KES')  # Kilimall Kenya uses KES
+            if price is not None:
+                results.append(ProductRecord(
+                    title=title_elem.text.strip(),
+                    price=price,
+                    currency=currency,
+                    source='Kilimall',
+                    url=product_url,
+                ))
+
+    return results
+
+
+BS4_PARSERS: Dict[str, Callable[[bytes], List[ProductRecord]]] = {
+    'Amazon': parse_amazon,
+    'eBay': parse_ebay,
+    'Jumia': parse_jumia,
+    'Kilimall': parse_kilimall,
+}
@@ -0,0 +1,78 @@
+"""Compare the BeautifulSoup parsers (bs4_parsers.py) with the lxml extraction engine.
+
+Run from Cartana/backend:
+
+    python -m benchmarks.parse_benchmark [iterations]
+
+Uses the captured Kilimall search page in app/kilimall_debug.html. The
+streaming runs feed the page in 16 KB chunks, as it would arrive off the
+socket, with and without a product cap.
+"""
+import sys
+import copy
+import time
+from pathlib import Path
+
+from app.services.extraction import build_extractor
+from app.services.parsers import get_extractor
+from app.services.retailer_registry import get_registry
+from benchmarks.bs4_parsers import BS4_PARSERS
+
+PAGE = Path(__file__).resolve().parent.parent / "app" / "kilimall_debug.html"
+CHUNK_SIZE = 16 * 1024
+CAP = 12
+
+
+def streamed(extractor):
+    """Feed a page chunk by chunk, stopping once the extractor is done."""
+    def run(html):
+        extraction = extractor.stream()
+        for start in range(0, len(html), CHUNK_SIZE):
+            extraction.feed(html[start:start + CHUNK_SIZE])
+            if extraction.done:
+                break
+        run.bytes_fed = extraction.bytes_fed
+        return extraction.close()
+    return run
+
+
+def bench(label, func, html, iterations):
+    func(html)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        results = func(html)
+    elapsed = (time.perf_counter() - start) / iterations
+    print(f"{label:<12} {elapsed * 1000:8.2f} ms/page  {len(results)} products")
+    return elapsed, results
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    html = PAGE.read_bytes()
+    print(f"Kilimall page: {len(html) / 1024:.0f} KB, {iterations} iterations")
+
+    bs4_time, bs4_results = bench("bs4", BS4_PARSERS["Kilimall"], html, iterations)
+    extractor = get_extractor(get_registry().get("Kilimall").spec)
+    lxml_time, lxml_results = bench("lxml", extractor.extract, html, iterations)
+
+    print(f"speedup: {bs4_time / lxml_time:.1f}x")
+    if bs4_results != lxml_results:
+        print("WARNING: bs4 and lxml results differ")
+
+    _, stream_results = bench("stream", streamed(extractor), html, iterations)
+    if stream_results != lxml_results:
+        print("WARNING: streamed and full-page results differ")
+
+    spec = copy.deepcopy(get_registry().get("Kilimall").spec)
+    spec["max_products"] = CAP
+    capped = build_extractor(spec)
+    run = streamed(capped)
+    capped_time, capped_results = bench(f"stream[{CAP}]", run, html, iterations)
+    print(f"stopped after {run.bytes_fed / 1024:.0f} of {len(html) / 1024:.0f} KB, "
+          f"{lxml_time / capped_time:.1f}x faster than a full parse")
+    if capped_results != lxml_results[:CAP]:
+        print("WARNING: capped stream is not a prefix of the full-page results")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare per-item clean_price with the batch clean_prices.
+
+Run from Cartana/backend:
+
+    python -m benchmarks.price_benchmark [rows]
+
+Uses a mix of price strings in the formats the retailers return (KSh with
+thousands separators, US and European decimals, ranges) and checks that
+both paths give exactly the same values and currencies.
+"""
+import logging
+import math
+import random
+import sys
+import time
+
+from app.utils.helpers import clean_price, clean_prices
+
+FORMATS = [
+    lambda v: f"KSh {v:,.0f}",
+    lambda v: f"\n   KSh {v:,.0f}\n  ",
+    lambda v: f"${v:,.2f}",
+    lambda v: f"US ${v:.2f}",
+    lambda v: f"£{v:,.2f}",
+    lambda v: f"{v:,.2f} €".replace(",", " ").replace(".", ","),
+    lambda v: f"${v:.2f} to ${v * 1.2:.2f}",
+    lambda v: "Price unavailable",
+]
+
+
+def make_prices(rows):
+    rng = random.Random(0)
+    return [rng.choice(FORMATS)(rng.uniform(1, 50000)) for _ in range(rows)]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # Same conditions for both paths: no per-price log output
+    logging.disable(logging.CRITICAL)
+    prices = make_prices(rows)
+
+    start = time.perf_counter()
+    scalar = [clean_price(price) for price in prices]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    values, currencies = clean_prices(prices)
+    batch_time = time.perf_counter() - start
+
+    print(f"{rows} prices")
+    print(f"clean_price   {scalar_time * 1000:8.1f} ms")
+    print(f"clean_prices  {batch_time * 1000:8.1f} ms  ({scalar_time / batch_time:.1f}x)")
+
+    for (value, currency), batch_value, batch_currency in zip(scalar, values, currencies):
+        batch_value = None if math.isnan(batch_value) else float(batch_value)
+        if value != batch_value or currency != batch_currency:
+            print(f"WARNING: results differ: {value} {currency} vs {batch_value} {batch_currency}")
+            break
+
+
+if __name__ == "__main__":
+    main()
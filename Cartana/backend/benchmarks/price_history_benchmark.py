@@ -0,0 +1,66 @@
+"""Price history store: write throughput, size on disk and range queries.
+
+Run from Cartana/backend:
+
+    python -m benchmarks.price_history_benchmark [products] [days]
+
+Writes to a throwaway directory in a temp directory. Each simulated day
+about a third of the products are observed once (rows are generated before
+timing), and the day's buffer is flushed as one segment, so segments are compacted tier by
+tier along the way.
+The query row times "last 90 days for product X" for random products, read
+from the memory-mapped segments.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.services.price_history import PriceHistoryStore
+
+DAY = 86400
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 180
+    rng = random.Random(0)
+    base_prices = {product_id: rng.uniform(5, 60000) for product_id in range(1, products + 1)}
+    end = time.time()
+    start_day = end - days * DAY
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceHistoryStore(os.path.join(tmp, 'history'))
+        daily_rows = [
+            [
+                {'id': product_id, 'price': round(price * rng.uniform(0.9, 1.1), 2), 'currency': 'KES'}
+                for product_id, price in base_prices.items() if rng.random() < 0.33
+            ]
+            for _ in range(days)
+        ]
+        observations = 0
+        start = time.perf_counter()
+        for day, rows in enumerate(daily_rows):
+            observations += store.record(rows, observed_at=start_day + day * DAY + rng.uniform(0, DAY / 2))
+            store.flush()
+        write_time = time.perf_counter() - start
+
+        snapshot = store.snapshot()
+        print(f"{observations} observations of {products} products over {days} days")
+        print(f"{'write':<10} {write_time * 1000:8.1f} ms  ({observations / write_time:,.0f} obs/s)")
+        print(f"{'on disk':<10} {snapshot['bytes_on_disk'] / observations:8.1f} bytes/obs  "
+              f"({snapshot['segments']} segments, {snapshot['compactions']} compactions)")
+        print(f"{'compacted':<10} {snapshot['compacted_rows'] / observations:8.1f} rewrites/obs")
+
+        queries = 1000
+        start = time.perf_counter()
+        points = 0
+        for _ in range(queries):
+            points += len(store.history(rng.randint(1, products), end - 90 * DAY, end))
+        query_time = time.perf_counter() - start
+        print(f"{'90 days':<10} {query_time / queries * 1000:8.3f} ms/query  ({points / queries:.0f} points)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Memory per product: ad-hoc dicts versus ProductRecord.
+
+Run from Cartana/backend:
+
+    python -m benchmarks.record_memory_benchmark [products]
+
+Measured with tracemalloc. Title and URL strings are created before
+measuring, so the numbers are the per-product overhead of the container
+itself plus whatever else each representation allocates. The pipeline rows
+follow one search's products from scrape to the formatted response: dicts
+copied at each stage as before, and records with a ProductBatch.
+"""
+import random
+import sys
+import tracemalloc
+
+from app.models.product_batch import ProductBatch
+from app.models.product_record import ProductRecord
+
+USD_TO_KES = 129.5
+RATES = {"USD": 1.0, "KES": USD_TO_KES}
+SOURCES = [('Amazon', 'USD'), ('eBay', 'USD'), ('Jumia', 'KES'), ('Kilimall', 'KES'), ('Oraimo Kenya', 'KES')]
+
+
+def make_fields(count):
+    rng = random.Random(0)
+    fields = []
+    for i in range(count):
+        source, currency = rng.choice(SOURCES)
+        # Parsed strings are fresh objects, not the interned literals
+        fields.append((
+            f'Wireless earbuds model {i} with charging case and noise cancelling',
+            round(rng.uniform(5, 60000), 2),
+            ''.join(currency),
+            ''.join(source),
+            f'https://www.example.com/catalog/item-{i}/?ref=search&page=1',
+            {'sku': f'OR-{i}', 'review_score': '4.5'} if source == 'Oraimo Kenya' else None,
+        ))
+    return fields
+
+
+def as_dicts(fields):
+    products = []
+    for title, price, currency, source, url, extra in fields:
+        product = {
+            'title': title, 'price': price, 'currency': currency,
+            'description': '', 'source': source, 'url': url,
+        }
+        if extra:
+            product.update(extra)
+        products.append(product)
+    return products
+
+
+def as_records(fields):
+    return [
+        ProductRecord(title, price, currency, source, url, extra=extra)
+        for title, price, currency, source, url, extra in fields
+    ]
+
+
+def dict_pipeline(fields):
+    """Scrape dicts, normalize them, then the formatted response dicts."""
+    products = as_dicts(fields)
+    for product in products:
+        if product['currency'] == 'USD':
+            product['price_kes'] = product['price'] * USD_TO_KES
+            product['price_usd'] = product['price']
+        else:
+            product['price_usd'] = product['price'] / USD_TO_KES
+            product['price_kes'] = product['price']
+    records = [dict(product) for product in sorted(products, key=lambda p: p['price_usd'])]
+    return [_format(p['title'], p['price'], p['currency'], p['price_usd'], p['price_kes'],
+                    p['source'], p['url']) for p in records]
+
+
+def record_pipeline(fields):
+    products = ProductBatch.from_records(as_records(fields)).convert(RATES).sort_by_usd().to_products()
+    return [_format(p.title, p.price, p.currency, p.price_usd, p.price_kes, p.source, p.url)
+            for p in products]
+
+
+def _format(title, price, currency, price_usd, price_kes, source, url):
+    return {
+        "title": title, "price": price, "currency": currency,
+        "display_price": f"{price:.2f} {currency}",
+        "price_usd": f"{price_usd:.2f} USD", "price_kes": f"{price_kes:.2f} KES",
+        "description": "", "source": source, "url": url, "logo_url": "/images/default-logo.png",
+    }
+
+
+def measure(func, fields):
+    """Bytes still held by the result and allocations made while building it."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func(fields)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    held = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del result
+    return held, blocks, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    fields = make_fields(count)
+    print(f"{count} products")
+    print(f"{'':<18} {'bytes/product':>14} {'blocks/product':>15} {'peak bytes/product':>19}")
+    for label, func in [
+        ("dict", as_dicts),
+        ("ProductRecord", as_records),
+        ("dict pipeline", dict_pipeline),
+        ("record pipeline", record_pipeline),
+    ]:
+        held, blocks, peak = measure(func, fields)
+        print(f"{label:<18} {held / count:14.1f} {blocks / count:15.2f} {peak / count:19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""SQLite storage backend: bulk inserts and concurrent reads.
+
+Run from Cartana/backend:
+
+    python -m benchmarks.sqlite_benchmark [products] [searches]
+
+Writes to a throwaway database in a temp directory. "row by row" upserts
+and links each product with its own execute() and commit, as a naive port
+of the Supabase calls would; "executemany" is
+SqliteSearchRepository.save_results, one transaction per search. Every
+search sees the same listings, so the catalog stays at one row per product
+while the join table grows. The read row times products_for_query called
+concurrently through the repository's thread offload.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from app.models.product_record import BASE_FIELDS, ProductRecord
+from app.repositories.sqlite_repository import _INSERT_LINK, _INSERT_SEARCH, _UPSERT_PRODUCT, SqliteSearchRepository
+from app.utils.url_canonicalizer import canonical_url
+
+
+def make_products(count):
+    return [
+        ProductRecord(f'Product {i}', 10.0 + i, 'KES', 'Jumia', f'https://example.com/p/{i}', price_usd=0.1 * i)
+        for i in range(count)
+    ]
+
+
+def row_by_row(repo, query, products):
+    conn = repo._connect()
+    search_id = conn.execute(_INSERT_SEARCH, (query, repo.queries.canonicalize(query), len(products))).lastrowid
+    conn.commit()
+    for position, product in enumerate(products):
+        row = product.to_dict(include_extra=False)
+        row['url'] = canonical_url(product.url)
+        conn.execute(_UPSERT_PRODUCT, tuple(row[field] for field in BASE_FIELDS))
+        product_id = conn.execute("SELECT id FROM catalog_products WHERE url = ?", (row['url'],)).fetchone()[0]
+        conn.execute(_INSERT_LINK, (search_id, position, product_id))
+        conn.commit()
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    searches = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    products = make_products(count)
+    print(f"{searches} searches of {count} products")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = SqliteSearchRepository(os.path.join(tmp, 'bench.sqlite3'))
+
+        start = time.perf_counter()
+        for i in range(searches):
+            row_by_row(repo, f'row query {i}', products)
+        naive = time.perf_counter() - start
+        print(f"{'row by row':<14} {naive / searches * 1000:8.2f} ms/search")
+
+        start = time.perf_counter()
+        for i in range(searches):
+            await repo.save_results(f'bulk query {i}', products)
+        bulk = time.perf_counter() - start
+        print(f"{'executemany':<14} {bulk / searches * 1000:8.2f} ms/search  ({naive / bulk:.1f}x)")
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(repo.products_for_query(f'bulk query {i}') for i in range(searches)))
+        reads = time.perf_counter() - start
+        assert all(len(rows) == count for rows in results)
+        print(f"{'reads':<14} {reads / searches * 1000:8.2f} ms/search")
+
+        conn = repo._connect()
+        catalog = conn.execute("SELECT count(*) FROM catalog_products").fetchone()[0]
+        links = conn.execute("SELECT count(*) FROM search_products").fetchone()[0]
+        print(f"{'storage':<14} {catalog} catalog rows for {links} search results")
+        await repo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())